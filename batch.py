@@ -0,0 +1,125 @@
+#Matthew Jordan and Paul Crowley
+#Batch analysis for Chess: searches a file of positions (one FEN per line) or replays/validates a file of PGN games,
+#spread over a pool of worker processes. Results are written as JSON lines in the same order as the input,
+#each one as soon as it (and everything before it) is done, so a long run can be watched or cut short.
+#Workers only import engine/search/pgn, never PySide6
+#
+# HOW TO USE:
+#       python batch.py positions.fen -o results.jsonl --depth 4          best move for every position
+#       python batch.py positions.fen -o results.jsonl --time 0.5         half a second per position instead
+#       python batch.py games.pgn -o results.jsonl                         checks every game move by move
+#       add --workers N to choose the number of processes (default: one per core) and --chunk N for the batch size
+
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+from engine import Game
+from search import Searcher
+from tablebase import Tablebase
+from pgn import PgnError, read_games, replay, result_of, san
+from bitboard import move_name
+
+_searcher = None # One per worker process so its transposition table is reused between positions
+_settings = None
+
+
+def _start_worker(depth, seconds, tt_megabytes):
+    '''Runs once in each worker process'''
+    global _searcher, _settings
+    _searcher = Searcher(tt_megabytes, Tablebase())
+    _settings = (depth, seconds)
+
+
+def read_positions(lines):
+    '''Yields the FEN on each line, skipping blank lines and # comments (EPD lines with only 4 fields work too)'''
+    for line in lines:
+        line = line.strip()
+        if line and not line.startswith('#'):
+            fields = line.split(';')[0].split()
+            if len(fields) == 4 or not all(field.isdigit() for field in fields[4:6]):
+                # EPD: no move counters, the 4 position fields may be followed by opcodes like bm e4; id "x";
+                fields = fields[:4] + ['0', '1']
+            yield ' '.join(fields[:6])
+
+
+def analyse_position(fen):
+    '''Searches one position, returning a dict for the output file'''
+    depth, seconds = _settings
+    try:
+        game = Game.from_fen(fen)
+        _searcher.tt.clear() # Positions are unrelated, old entries would only be noise
+        move, score, reached = _searcher.search(game, think_time=seconds, max_depth=depth)
+        result = {'fen': fen, 'move': None, 'san': None, 'score': score, 'depth': reached, 'nodes': _searcher.nodes}
+        if move is not None:
+            result['move'] = move_name(move)
+            result['san'] = san(game, move)
+    except ValueError as error:
+        return {'fen': fen, 'error': str(error)}
+    except Exception as error:
+        # Anything raised here would fail the whole chunk in pool.imap, so it goes in this position's record
+        return {'fen': fen, 'error': f'{type(error).__name__}: {error}'}
+    return result
+
+
+def validate_game(game):
+    '''Replays one (headers, movetext) game from pgn.read_games, returning a dict for the output file'''
+    headers, movetext = game
+    result = {'white': headers.get('White', '?'), 'black': headers.get('Black', '?'), 'result': headers.get('Result', '*')}
+    try:
+        played = replay(headers, movetext)
+    except (PgnError, ValueError) as error:
+        result['error'] = str(error)
+        return result
+    except Exception as error:
+        result['error'] = f'{type(error).__name__}: {error}'
+        return result
+    result['plies'] = len(played.history)
+    result['final_fen'] = played.fen()
+    # Flag games whose Result tag disagrees with a checkmate/stalemate/repetition we can see on the board
+    if result_of(played) != '*' and result_of(played) != result['result']:
+        result['error'] = f'Result tag {result["result"]} but the game ended {result_of(played)}'
+    return result
+
+
+def run(input_path, output_path, workers=None, chunk=8, depth=4, seconds=None, tt_megabytes=16):
+    '''Processes the whole input file, returning (items done, items with an error, seconds taken)'''
+    games = input_path.lower().endswith('.pgn')
+    work = validate_game if games else analyse_position
+    done = errors = 0
+    start = time.perf_counter()
+    with open(input_path, encoding='utf-8', errors='replace') as source, open(output_path, 'w') as output:
+        items = read_games(source) if games else read_positions(source)
+        with multiprocessing.Pool(workers, initializer=_start_worker, initargs=(depth, seconds, tt_megabytes)) as pool:
+            # imap hands the workers chunk items at a time but gives the results back in input order
+            for result in pool.imap(work, items, chunksize=chunk):
+                done += 1
+                errors += 'error' in result
+                output.write(json.dumps(result) + '\n')
+                output.flush()
+    return done, errors, time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Analyse positions or validate games on every core')
+    parser.add_argument('input', help='a file of FEN/EPD lines, or a .pgn file of games')
+    parser.add_argument('-o', '--output', required=True, help='JSON lines results file')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='number of processes (default: one per core)')
+    parser.add_argument('--chunk', type=int, default=8, help='positions/games sent to a worker at a time (default 8)')
+    parser.add_argument('--depth', type=int, default=4, help='search depth for positions (default 4)')
+    parser.add_argument('--time', type=float, help='seconds per position, stops the search early')
+    parser.add_argument('--hash', type=int, default=16, help='transposition table megabytes per worker (default 16)')
+    args = parser.parse_args(argv)
+
+    done, errors, seconds = run(args.input, args.output, args.workers, args.chunk, args.depth, args.time, args.hash)
+    rate = done / seconds if seconds else 0
+    print(f'{done} done, {errors} with errors, {seconds:.1f}s ({rate:.1f} per second on {args.workers} workers)')
+    return 1 if errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
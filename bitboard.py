@@ -0,0 +1,300 @@
+#Matthew Jordan and Paul Crowley
+#Bitboard representation for Chess: every (color, piece type) gets one 64-bit integer, one bit per square
+#Squares are numbered row * 8 + col using the same rows/cols as Chess.pieces (row 0 is black's back rank)
+#Attack tables for knights, kings and pawns are built once at import, sliders use precomputed rays
+
+
+from pieces import Pawn, Rook, Knight, Bishop, Queen, King, Empty
+
+WHITE, BLACK = 0, 1
+PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING = range(6)
+
+COLORS = {'white': WHITE, 'black': BLACK}
+COLOR_NAMES = ('white', 'black')
+KINDS = {'Pawn': PAWN, 'Knight': KNIGHT, 'Bishop': BISHOP, 'Rook': ROOK, 'Queen': QUEEN, 'King': KING}
+PIECE_CLASSES = (Pawn, Knight, Bishop, Rook, Queen, King)
+PROMOTIONS = (QUEEN, ROOK, BISHOP, KNIGHT)
+
+# A flat board is 64 bytes, one per square, holding color * 6 + kind or EMPTY_CODE
+EMPTY_CODE = 12
+CODE_PIECES = tuple(PIECE_CLASSES[code % 6](COLOR_NAMES[code // 6]) for code in range(12)) + (Empty(),)
+
+FULL = (1 << 64) - 1
+
+
+def square(row, col):
+    return row * 8 + col
+
+
+def row_col(sq):
+    return divmod(sq, 8)
+
+
+def square_name(sq):
+    '''Algebraic name of a square, e.g. 0 -> a8, 63 -> h1'''
+    return 'abcdefgh'[sq % 8] + str(8 - sq // 8)
+
+
+def move_name(move):
+    '''Long algebraic name of a move (start, end, promotion), e.g. e2e4 or e7e8q'''
+    start, end, promotion = move
+    return square_name(start) + square_name(end) + ('' if promotion is None else 'pnbrqk'[promotion])
+
+
+def parse_square(name):
+    '''Square number from an algebraic name like e4'''
+    return square(8 - int(name[1]), ord(name[0]) - ord('a'))
+
+
+def squares(bb):
+    '''Yields the index of every set bit, lowest first'''
+    while bb:
+        low = bb & -bb
+        yield low.bit_length() - 1
+        bb ^= low
+
+
+def piece_code(piece):
+    '''The flat board byte for a piece object'''
+    return EMPTY_CODE if piece.color is None else COLORS[piece.color] * 6 + KINDS[str(piece)]
+
+
+def lsb(bb):
+    return (bb & -bb).bit_length() - 1
+
+
+def msb(bb):
+    return bb.bit_length() - 1
+
+
+def _step_table(offsets):
+    '''Attack table for pieces that jump a fixed set of (row, col) offsets (knight, king)'''
+    table = []
+    for sq in range(64):
+        row, col = row_col(sq)
+        attacks = 0
+        for dr, dc in offsets:
+            r, c = row + dr, col + dc
+            if 0 <= r < 8 and 0 <= c < 8:
+                attacks |= 1 << square(r, c)
+        table.append(attacks)
+    return table
+
+
+KNIGHT_ATTACKS = _step_table([(-2, -1), (-2, 1), (-1, -2), (-1, 2), (1, -2), (1, 2), (2, -1), (2, 1)])
+KING_ATTACKS = _step_table([(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)])
+# White pawns go up the board (row - 1), black pawns go down (row + 1)
+PAWN_ATTACKS = (_step_table([(-1, -1), (-1, 1)]), _step_table([(1, -1), (1, 1)]))
+
+# Rays in each direction, not including the starting square
+# A direction is "positive" when it walks towards higher square numbers, so its nearest blocker is the lowest bit
+ROOK_DIRECTIONS = ((-1, 0), (1, 0), (0, -1), (0, 1))
+BISHOP_DIRECTIONS = ((-1, -1), (-1, 1), (1, -1), (1, 1))
+
+
+def _ray_table(dr, dc):
+    table = []
+    for sq in range(64):
+        row, col = row_col(sq)
+        ray = 0
+        r, c = row + dr, col + dc
+        while 0 <= r < 8 and 0 <= c < 8:
+            ray |= 1 << square(r, c)
+            r, c = r + dr, c + dc
+        table.append(ray)
+    return table
+
+
+ROOK_RAYS = tuple((_ray_table(dr, dc), dr > 0 or (dr == 0 and dc > 0)) for dr, dc in ROOK_DIRECTIONS)
+BISHOP_RAYS = tuple((_ray_table(dr, dc), dr > 0) for dr, dc in BISHOP_DIRECTIONS)
+
+
+def _slide(sq, occupied, rays):
+    '''Attacks along each ray up to and including the first blocker'''
+    attacks = 0
+    for table, positive in rays:
+        ray = table[sq]
+        blockers = ray & occupied
+        if blockers:
+            first = (blockers & -blockers).bit_length() - 1 if positive else blockers.bit_length() - 1
+            ray ^= table[first] # Cut off everything behind the blocker
+        attacks |= ray
+    return attacks
+
+
+def rook_attacks(sq, occupied):
+    return _slide(sq, occupied, ROOK_RAYS)
+
+
+def bishop_attacks(sq, occupied):
+    return _slide(sq, occupied, BISHOP_RAYS)
+
+
+def queen_attacks(sq, occupied):
+    return _slide(sq, occupied, ROOK_RAYS) | _slide(sq, occupied, BISHOP_RAYS)
+
+
+def attacks(color, kind, sq, occupied):
+    '''Squares a piece on sq attacks (for pawns only the diagonal captures)'''
+    if kind == PAWN:
+        return PAWN_ATTACKS[color][sq]
+    if kind == KNIGHT:
+        return KNIGHT_ATTACKS[sq]
+    if kind == BISHOP:
+        return bishop_attacks(sq, occupied)
+    if kind == ROOK:
+        return rook_attacks(sq, occupied)
+    if kind == QUEEN:
+        return queen_attacks(sq, occupied)
+    return KING_ATTACKS[sq]
+
+
+class Bitboards:
+    '''The board as 12 integers indexed by color * 6 + kind, plus the occupancy of each color'''
+
+    def __init__(self):
+        self.boards = [0] * 12
+        self.colors = [0, 0]
+        self.occupied = 0
+
+    @classmethod
+    def from_board(cls, board):
+        '''Builds the bitboards from a flat 64 byte board'''
+        bitboards = cls()
+        for sq, code in enumerate(board):
+            if code != EMPTY_CODE:
+                bitboards.add(code // 6, code % 6, sq)
+        return bitboards
+
+    @classmethod
+    def from_pieces(cls, pieces):
+        '''Adapter from the 2d list of piece objects used by the GUI and piece classes'''
+        return cls.from_board([piece_code(pieces[row][col]) for row in range(8) for col in range(8)])
+
+    def to_pieces(self):
+        '''Adapter back to a 2d list of piece objects'''
+        pieces = [[CODE_PIECES[EMPTY_CODE]] * 8 for row in range(8)]
+        for index, bb in enumerate(self.boards):
+            for sq in squares(bb):
+                row, col = row_col(sq)
+                pieces[row][col] = CODE_PIECES[index]
+        return pieces
+
+    def copy(self):
+        bitboards = Bitboards()
+        bitboards.boards = self.boards[:]
+        bitboards.colors = self.colors[:]
+        bitboards.occupied = self.occupied
+        return bitboards
+
+    def add(self, color, kind, sq):
+        mask = 1 << sq
+        self.boards[color * 6 + kind] |= mask
+        self.colors[color] |= mask
+        self.occupied |= mask
+
+    def remove(self, color, kind, sq):
+        mask = ~(1 << sq)
+        self.boards[color * 6 + kind] &= mask
+        self.colors[color] &= mask
+        self.occupied &= mask
+
+    def move(self, color, kind, start, end):
+        '''Moves a piece between two squares (the end square must already be empty)'''
+        mask = (1 << start) | (1 << end)
+        self.boards[color * 6 + kind] ^= mask
+        self.colors[color] ^= mask
+        self.occupied ^= mask
+
+    def piece_at(self, sq):
+        '''Returns (color, kind) of the piece on sq, or None if it is empty'''
+        mask = 1 << sq
+        if not self.occupied & mask:
+            return None
+        for index, bb in enumerate(self.boards):
+            if bb & mask:
+                return divmod(index, 6)
+
+    def targets(self, sq):
+        '''Every square the piece on sq may move to, following the same rules as the piece classes'''
+        found = self.piece_at(sq)
+        if found is None:
+            return 0
+        color, kind = found
+        if kind == PAWN:
+            return self.pawn_targets(color, sq)
+        return attacks(color, kind, sq, self.occupied) & ~self.colors[color]
+
+    def pawn_targets(self, color, sq):
+        '''Forward pushes onto empty squares (two from the starting row) plus diagonal captures'''
+        empty = ~self.occupied & FULL
+        if color == WHITE:
+            push = (1 << sq >> 8) & empty
+            if push and 48 <= sq < 56: # Still on its starting row, so it may move two
+                push |= (push >> 8) & empty
+        else:
+            push = (1 << sq << 8) & empty
+            if push and 8 <= sq < 16:
+                push |= (push << 8) & empty
+        return push | (PAWN_ATTACKS[color][sq] & self.colors[color ^ 1])
+
+    def can_move(self, start_row, start_col, end_row, end_col):
+        return bool(self.targets(square(start_row, start_col)) >> square(end_row, end_col) & 1)
+
+    def moves_from(self, sq):
+        '''Lazily yields the destination squares of the piece on sq'''
+        return squares(self.targets(sq))
+
+    def generate_moves(self, color, ep_square=None):
+        '''Lazily yields (start, end, promotion) for every move the given color's pieces can make, piece by piece,
+        so callers that only need the first few moves can stop early. These follow the piece patterns only,
+        it is up to the caller to throw out moves that leave the king in check (see engine.Game.legal_moves).
+        promotion is the kind a pawn turns into on the last row (one move per kind), otherwise None'''
+        not_own = ~self.colors[color]
+        occupied = self.occupied
+        boards = self.boards
+        base = color * 6
+        ep_bit = 0 if ep_square is None else 1 << ep_square
+        last_row = 0 if color == WHITE else 7
+        for sq in squares(boards[base + PAWN]):
+            for end in squares(self.pawn_targets(color, sq) | (PAWN_ATTACKS[color][sq] & ep_bit)):
+                if end >> 3 == last_row:
+                    for kind in PROMOTIONS:
+                        yield sq, end, kind
+                else:
+                    yield sq, end, None
+        for sq in squares(boards[base + KNIGHT]):
+            for end in squares(KNIGHT_ATTACKS[sq] & not_own):
+                yield sq, end, None
+        for sq in squares(boards[base + BISHOP]):
+            for end in squares(_slide(sq, occupied, BISHOP_RAYS) & not_own):
+                yield sq, end, None
+        for sq in squares(boards[base + ROOK]):
+            for end in squares(_slide(sq, occupied, ROOK_RAYS) & not_own):
+                yield sq, end, None
+        for sq in squares(boards[base + QUEEN]):
+            for end in squares(queen_attacks(sq, occupied) & not_own):
+                yield sq, end, None
+        for sq in squares(boards[base + KING]):
+            for end in squares(KING_ATTACKS[sq] & not_own):
+                yield sq, end, None
+
+    def is_attacked(self, sq, by_color, occupied=None, ignore=0):
+        '''True if any piece of by_color attacks sq. occupied and ignore let the caller ask
+        "what if" questions (pieces moved away / captured) without changing the boards'''
+        if occupied is None:
+            occupied = self.occupied
+        boards = self.boards
+        base = by_color * 6
+        keep = ~ignore
+        if KNIGHT_ATTACKS[sq] & boards[base + KNIGHT] & keep:
+            return True
+        # A pawn attacks sq from the squares a pawn of the other color on sq would attack
+        if PAWN_ATTACKS[by_color ^ 1][sq] & boards[base + PAWN] & keep:
+            return True
+        if KING_ATTACKS[sq] & boards[base + KING]:
+            return True
+        queens = boards[base + QUEEN]
+        if _slide(sq, occupied, ROOK_RAYS) & (boards[base + ROOK] | queens) & keep:
+            return True
+        return bool(_slide(sq, occupied, BISHOP_RAYS) & (boards[base + BISHOP] | queens) & keep)
@@ -0,0 +1,181 @@
+#Matthew Jordan and Paul Crowley
+#Opening book for Chess: a file of 16 byte entries in the Polyglot layout (big-endian key u64, move u16,
+#weight u16, learn u32) sorted by key. The file is memory-mapped and binary searched, so a book of any size
+#opens instantly and only the pages that get looked at are ever read from disk
+#
+#The keys are engine.Game.hash (our own Zobrist keys from zobrist.py), not Polyglot's Random64 table,
+#so books have to be built with this file rather than downloaded
+#
+# HOW TO USE:
+#       python book.py build games.pgn [more.pgn ...] -o book.bin --plies 16
+#       python book.py probe book.bin [--fen "<fen>"]          lists the book moves for a position
+#Chess.py plays from book.bin (next to it) when the file exists
+
+
+import argparse
+import mmap
+import random
+import struct
+import sys
+from collections import defaultdict
+
+from engine import Game
+from bitboard import KING, KNIGHT, BISHOP, ROOK, QUEEN
+from pgn import read_games, san_moves, parse_san, san, PgnError
+
+ENTRY = struct.Struct('>QHHI')
+# Promotion piece in bits 12-14 of a Polyglot move
+PROMOTION_CODES = {KNIGHT: 1, BISHOP: 2, ROOK: 3, QUEEN: 4}
+PROMOTION_KINDS = {code: kind for kind, code in PROMOTION_CODES.items()}
+
+
+def encode_move(game, move):
+    '''Polyglot move bits: to file, to rank, from file, from rank (ranks counted from white's side), promotion.
+    Castling is written as the king taking its own rook, like Polyglot does'''
+    start, end, promotion = move
+    if game.board[start] % 6 == KING and abs(end - start) == 2:
+        end = start + 3 if end > start else start - 4
+    code = (end % 8) | (7 - end // 8) << 3 | (start % 8) << 6 | (7 - start // 8) << 9
+    if promotion is not None:
+        code |= PROMOTION_CODES[promotion] << 12
+    return code
+
+
+def decode_move(game, code):
+    '''The legal move (start, end, promotion) a Polyglot move means in the game's position, or None'''
+    end = (7 - (code >> 3 & 7)) * 8 + (code & 7)
+    start = (7 - (code >> 9 & 7)) * 8 + (code >> 6 & 7)
+    promotion = PROMOTION_KINDS.get(code >> 12 & 7)
+    if game.board[start] % 6 == KING and abs(end - start) in (3, 4) and end // 8 == start // 8:
+        end = start + 2 if end > start else start - 2 # King takes rook means castling
+    move = (start, end, promotion)
+    # Keys are only 64 bits, so never trust an entry without checking the move is legal here
+    return move if move in game.generate_moves() else None
+
+
+class OpeningBook:
+    def __init__(self, path):
+        self.file = open(path, 'rb')
+        size = self.file.seek(0, 2)
+        # An empty file can't be mapped, it just has no entries
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if size else b''
+        self.count = size // ENTRY.size
+
+    def __len__(self):
+        return self.count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+        self.file.close()
+
+    def _key(self, index):
+        return ENTRY.unpack_from(self.data, index * ENTRY.size)[0]
+
+    def entries(self, key):
+        '''Every (move code, weight, learn) stored for key'''
+        # Binary search for the first entry with this key, then read forward while the key matches
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self._key(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        found = []
+        while low < self.count:
+            entry_key, move, weight, learn = ENTRY.unpack_from(self.data, low * ENTRY.size)
+            if entry_key != key:
+                break
+            found.append((move, weight, learn))
+            low += 1
+        return found
+
+    def moves(self, game):
+        '''[(move, weight)] for the legal book moves in the game's position, heaviest first'''
+        found = []
+        for code, weight, learn in self.entries(game.hash):
+            move = decode_move(game, code)
+            if move is not None:
+                found.append((move, weight))
+        found.sort(key=lambda item: item[1], reverse=True)
+        return found
+
+    def choose(self, game, rng=random):
+        '''A book move picked at random in proportion to its weight, or None when out of book'''
+        found = [(move, weight) for move, weight in self.moves(game) if weight > 0]
+        if not found:
+            return None
+        return rng.choices([move for move, weight in found], weights=[weight for move, weight in found])[0]
+
+
+def build_book(paths, output, plies=16, min_games=1):
+    '''Builds a book from PGN files: every move played in the first plies of a game gets weight 2 when its side
+    went on to win, 1 for a draw, 0 for a loss (Polyglot's usual weighting). Returns the number of entries'''
+    weights = defaultdict(int) # (key, move code): weight
+    seen = defaultdict(int) # (key, move code): number of games
+    for path in paths:
+        with open(path, encoding='utf-8', errors='replace') as file:
+            for headers, movetext in read_games(file):
+                result = headers.get('Result', '*')
+                if result == '*' or 'FEN' in headers:
+                    continue
+                game = Game()
+                try:
+                    for ply, text in enumerate(san_moves(movetext)):
+                        if ply >= plies:
+                            break
+                        move = parse_san(game, text)
+                        entry = (game.hash, encode_move(game, move))
+                        seen[entry] += 1
+                        winner = '1-0' if game.turn == 'white' else '0-1'
+                        weights[entry] += 1 if result == '1/2-1/2' else 2 if result == winner else 0
+                        game.make_move(*move)
+                except PgnError:
+                    continue # Keep the moves before the bad one
+
+    entries = sorted((key, move, min(weight, 0xFFFF)) for (key, move), weight in weights.items()
+                     if seen[(key, move)] >= min_games)
+    with open(output, 'wb') as file:
+        for key, move, weight in entries:
+            file.write(ENTRY.pack(key, move, weight, 0))
+    return len(entries)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Build or look into an opening book')
+    commands = parser.add_subparsers(dest='command', required=True)
+    build = commands.add_parser('build', help='build a book from PGN files')
+    build.add_argument('pgn', nargs='+')
+    build.add_argument('-o', '--output', default='book.bin')
+    build.add_argument('--plies', type=int, default=16, help='how many moves into each game to take (default 16)')
+    build.add_argument('--min-games', type=int, default=1, help='leave out moves played in fewer games than this')
+    probe = commands.add_parser('probe', help='list the book moves for a position')
+    probe.add_argument('book')
+    probe.add_argument('--fen', help='position to look up (default: the start position)')
+    args = parser.parse_args(argv)
+
+    if args.command == 'build':
+        count = build_book(args.pgn, args.output, args.plies, args.min_games)
+        print(f'{count} entries written to {args.output}')
+        return 0
+
+    game = Game.from_fen(args.fen) if args.fen else Game()
+    with OpeningBook(args.book) as book:
+        moves = book.moves(game)
+        total = sum(weight for move, weight in moves) or 1
+        for move, weight in moves:
+            print(f'{san(game, move):<8} {weight:>6} {weight / total:>6.1%}')
+        if not moves:
+            print('not in book')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
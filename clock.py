@@ -0,0 +1,95 @@
+#Matthew Jordan and Paul Crowley
+#Chess clock that keeps time from time.monotonic() timestamps instead of counting timer ticks,
+#so a late or missed QTimer tick (or a busy event loop) can't make it drift. No Qt in here,
+#Chess.py only asks it what to show, and the computer player asks it how much time it has
+#
+#Time controls: base seconds each, plus optionally
+#       increment   Fischer: added to the mover's clock after every move
+#       delay       seconds each move can use before the clock counts down, either
+#                   'simple' (US delay, the clock waits) or 'bronstein' (time used, up to the delay, is given back)
+
+
+import time
+
+DELAY_TYPES = ('simple', 'bronstein')
+
+
+class GameClock:
+    def __init__(self, base=60, increment=0, delay=0, delay_type='simple', now=time.monotonic):
+        if delay_type not in DELAY_TYPES:
+            raise ValueError(f'delay_type must be one of {DELAY_TYPES}, not {delay_type!r}')
+        self.base = base
+        self.increment = increment
+        self.delay = delay
+        self.delay_type = delay_type
+        self.now = now # Swappable so tests and the server can drive the clock themselves
+        self.reset()
+
+    def reset(self):
+        '''Both sides back to the base time, clock stopped'''
+        self.times = {'white': float(self.base), 'black': float(self.base)} # Banked time, not counting the running turn
+        self.running = None # Color whose clock is running, None when stopped
+        self.turn_started = None
+
+    def _used(self):
+        '''Seconds the running side has used this turn that actually come off its clock'''
+        used = self.now() - self.turn_started
+        if self.delay_type == 'simple':
+            used = max(0.0, used - self.delay)
+        return used
+
+    def start(self, color):
+        '''Starts (or resumes) color's clock without giving anyone an increment, stopping the other one'''
+        self.stop()
+        self.running = color
+        self.turn_started = self.now()
+
+    def stop(self):
+        '''Stops the running clock, keeping the time it used'''
+        if self.running is not None:
+            self.times[self.running] -= self._used()
+            self.running = None
+
+    def press(self):
+        '''The running side finished its move: charges the time it used, adds the increment or Bronstein delay,
+        and starts the other side's clock. Returns the mover's time left'''
+        color = self.running
+        if color is None:
+            return None
+        used = self.now() - self.turn_started
+        self.stop()
+        if self.times[color] > 0: # A side that already ran out doesn't get time back
+            if self.delay_type == 'bronstein':
+                self.times[color] += min(used, self.delay)
+            self.times[color] += self.increment
+        self.start('black' if color == 'white' else 'white')
+        return self.times[color]
+
+    def set(self, white, black, running=None):
+        '''Sets both times (e.g. to what a game server says they are) and starts running's clock, if given'''
+        self.running = None
+        self.times = {'white': float(white), 'black': float(black)}
+        if running is not None:
+            self.start(running)
+
+    def remaining(self, color):
+        '''Seconds color has left right now (never below 0)'''
+        left = self.times[color]
+        if color == self.running:
+            left -= self._used()
+        return max(0.0, left)
+
+    def flagged(self):
+        '''The color that has run out of time, or None'''
+        for color in ('white', 'black'):
+            if self.remaining(color) <= 0:
+                return color
+        return None
+
+    def text(self, color):
+        '''How color's time is shown: minutes:seconds, with tenths in the last 10 seconds'''
+        left = self.remaining(color)
+        if left < 10:
+            return f'{int(left * 10) / 10:.1f}' # Truncated so it never shows time that has gone
+        left = int(left)
+        return f'{left // 60}:{left % 60:02d}'
@@ -0,0 +1,470 @@
+#Matthew Jordan and Paul Crowley
+#Headless game engine for Chess: owns the board, whose turn it is, captures and scores
+#No Qt in here so positions can be played/analysed without a QApplication (Chess.py just drives this)
+
+
+import struct
+
+from pieces import Pawn, Rook, Knight, Bishop, Queen, King, Empty
+from bitboard import (Bitboards, WHITE, BLACK, PAWN, ROOK, QUEEN, KING, COLORS,
+                      EMPTY_CODE, CODE_PIECES, piece_code, square, row_col, squares, lsb,
+                      square_name, parse_square, PAWN_ATTACKS)
+from zobrist import PIECE_KEYS, BLACK_TO_MOVE, CASTLING_KEYS, EP_KEYS, hash_position
+
+
+# Castling rights are bits: white king side, white queen side, black king side, black queen side
+WHITE_KINGSIDE, WHITE_QUEENSIDE, BLACK_KINGSIDE, BLACK_QUEENSIDE = 1, 2, 4, 8
+ALL_CASTLING = 15
+
+# right: (color, king start, king end, rook start, rook end, squares that must be empty, squares the king crosses)
+CASTLES = {
+    WHITE_KINGSIDE: (WHITE, 60, 62, 63, 61, (61, 62), (60, 61, 62)),
+    WHITE_QUEENSIDE: (WHITE, 60, 58, 56, 59, (57, 58, 59), (60, 59, 58)),
+    BLACK_KINGSIDE: (BLACK, 4, 6, 7, 5, (5, 6), (4, 5, 6)),
+    BLACK_QUEENSIDE: (BLACK, 4, 2, 0, 3, (1, 2, 3), (4, 3, 2)),
+}
+
+# Moving a king or rook off its starting square (or capturing a rook there) loses those rights
+CASTLE_MASK = [ALL_CASTLING] * 64
+CASTLE_MASK[60] &= ~(WHITE_KINGSIDE | WHITE_QUEENSIDE)
+CASTLE_MASK[63] &= ~WHITE_KINGSIDE
+CASTLE_MASK[56] &= ~WHITE_QUEENSIDE
+CASTLE_MASK[4] &= ~(BLACK_KINGSIDE | BLACK_QUEENSIDE)
+CASTLE_MASK[7] &= ~BLACK_KINGSIDE
+CASTLE_MASK[0] &= ~BLACK_QUEENSIDE
+
+
+START_FEN = 'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1'
+FEN_LETTERS = 'PNBRQKpnbrqk' # Indexed by the flat board code (color * 6 + kind)
+FEN_CASTLING = 'KQkq' # In the same order as the castling bits
+
+# Packed positions are always 32 bytes: occupied squares (8), a 4 bit code per occupied square in square order (16),
+# flags = black to move + castling bits << 1 (1), en passant square or 255 (1), halfmove clock (2), fullmove number (2), padding (2)
+PACK_FORMAT = struct.Struct('>Q16sBBHH2x')
+
+
+class Game:
+    def __init__(self):
+        '''Sets up all the info for a new game'''
+        self.initialize_pieces()
+        self.setup('white', ALL_CASTLING, None)
+
+    @classmethod
+    def from_fen(cls, fen):
+        '''A game starting from a position in FEN (Forsyth-Edwards Notation). Missing trailing fields
+        default to white to move, no castling, no en passant, move 1. Raises ValueError for a broken FEN'''
+        fields = fen.split()
+        if not fields or len(fields) > 6:
+            raise ValueError(f'bad FEN: {fen!r}')
+        fields += ['w', '-', '-', '0', '1'][len(fields) - 1:]
+        placement, side, castling_field, ep_field, halfmove, fullmove = fields
+
+        game = cls.__new__(cls)
+        game.board = bytearray([EMPTY_CODE]) * 64
+        ranks = placement.split('/')
+        if len(ranks) != 8:
+            raise ValueError(f'bad FEN, needs 8 ranks: {fen!r}')
+        for row, rank in enumerate(ranks): # FEN lists rank 8 first, same as our row 0
+            col = 0
+            for char in rank:
+                if char in '12345678':
+                    col += int(char)
+                elif char in FEN_LETTERS and col < 8:
+                    game.board[square(row, col)] = FEN_LETTERS.index(char)
+                    col += 1
+                else:
+                    raise ValueError(f'bad FEN, unexpected {char!r} in rank {8 - row}: {fen!r}')
+            if col != 8:
+                raise ValueError(f'bad FEN, rank {8 - row} is not 8 squares: {fen!r}')
+        if game.board.count(KING) != 1 or game.board.count(6 + KING) != 1:
+            raise ValueError(f'bad FEN, each side needs one king: {fen!r}')
+        if side not in ('w', 'b'):
+            raise ValueError(f'bad FEN, side to move must be w or b: {fen!r}')
+
+        castling = 0
+        if castling_field != '-':
+            for char in castling_field:
+                if char not in FEN_CASTLING:
+                    raise ValueError(f'bad FEN, unexpected castling {char!r}: {fen!r}')
+                castling |= 1 << FEN_CASTLING.index(char)
+        # A right is only kept if its king and rook are still on their starting squares
+        for right, (color, king_start, king_end, rook_start, *rest) in CASTLES.items():
+            if game.board[king_start] != color * 6 + KING or game.board[rook_start] != color * 6 + ROOK:
+                castling &= ~right
+        ep_square = None
+        if ep_field != '-':
+            # Behind a pawn that just moved two squares: rank 6 with white to move (a black pawn below it), rank 3 with black
+            if len(ep_field) != 2 or ep_field[0] not in 'abcdefgh' or ep_field[1] != ('6' if side == 'w' else '3'):
+                raise ValueError(f'bad FEN, bad en passant square: {fen!r}')
+            ep_square = parse_square(ep_field)
+            if game.board[ep_square + 8 if side == 'w' else ep_square - 8] != (6 + PAWN if side == 'w' else PAWN):
+                raise ValueError(f'bad FEN, no pawn in front of the en passant square: {fen!r}')
+        if not (halfmove.isdigit() and fullmove.isdigit()):
+            raise ValueError(f'bad FEN, move counters must be numbers: {fen!r}')
+        game.setup('black' if side == 'b' else 'white', castling, ep_square, int(halfmove), max(1, int(fullmove)))
+        return game
+
+    def fen(self):
+        '''The current position in FEN'''
+        ranks = []
+        for row in range(8):
+            rank = ''
+            empty = 0
+            for code in self.board[row * 8:row * 8 + 8]:
+                if code == EMPTY_CODE:
+                    empty += 1
+                else:
+                    if empty:
+                        rank += str(empty)
+                        empty = 0
+                    rank += FEN_LETTERS[code]
+            ranks.append(rank + (str(empty) if empty else ''))
+        castling = ''.join(char for bit, char in enumerate(FEN_CASTLING) if self.castling >> bit & 1) or '-'
+        ep = '-' if self.ep_square is None else square_name(self.ep_square)
+        return f"{'/'.join(ranks)} {self.turn[0]} {castling} {ep} {self.halfmove_clock} {self.fullmove_number}"
+
+    def pack(self):
+        '''The current position in 32 bytes (see PACK_FORMAT), for storing lots of positions or sending them between processes'''
+        occupied = self.bitboards.occupied
+        nibbles = bytearray(16)
+        for index, sq in enumerate(squares(occupied)):
+            if index == 32:
+                raise ValueError('cannot pack more than 32 pieces')
+            nibbles[index >> 1] |= self.board[sq] << (4 * (index & 1))
+        flags = (self.turn == 'black') | self.castling << 1
+        ep = 255 if self.ep_square is None else self.ep_square
+        # The counters get 16 bits each. Anything bigger only comes from a made up FEN, and the clock only matters up to 100
+        return PACK_FORMAT.pack(occupied, bytes(nibbles), flags, ep, min(self.halfmove_clock, 0xFFFF), min(self.fullmove_number, 0xFFFF))
+
+    @classmethod
+    def from_packed(cls, data):
+        '''A game starting from a position made by pack()'''
+        occupied, nibbles, flags, ep, halfmove, fullmove = PACK_FORMAT.unpack(data)
+        game = cls.__new__(cls)
+        game.board = bytearray([EMPTY_CODE]) * 64
+        for index, sq in enumerate(squares(occupied)):
+            game.board[sq] = nibbles[index >> 1] >> (4 * (index & 1)) & 15
+        game.setup('black' if flags & 1 else 'white', flags >> 1, None if ep == 255 else ep, halfmove, fullmove)
+        return game
+
+    def setup(self, turn, castling, ep_square, halfmove_clock=0, fullmove_number=1):
+        '''Works out everything else (bitboards, kings, hash, scores, undo stack) from self.board'''
+        self.bitboards = Bitboards.from_board(self.board) # Kept in step with self.board on every move
+        self.turn = turn
+        self.winner = None
+        self.result = None # 'checkmate', 'stalemate', 'repetition' or 'timeout' once the game is over
+
+        # Kings are tracked as they move so check tests never have to search the board
+        self.king_squares = [lsb(self.bitboards.boards[color * 6 + KING]) for color in (WHITE, BLACK)]
+        self.castling = castling
+        self.ep_square = ep_square # Square a pawn skipped over with its double step (can be captured en passant)
+        self.hash = hash_position(self.bitboards, turn == 'black', castling, ep_square) # Zobrist hash, updated every move
+        self.halfmove_clock = halfmove_clock # Moves since the last capture or pawn move
+        self.start_ply = (fullmove_number - 1) * 2 + (turn == 'black') # Half-moves played before this game's first position
+
+        # Scores are the total points of the pieces each side has captured
+        self.white_score = 0
+        self.black_score = 0
+        self.white_captures = [] # Black pieces taken by white
+        self.black_captures = [] # White pieces taken by black
+
+        # Undo stack, one tuple per move made:
+        # (start, end, promotion, moved piece code, captured piece code, captured square, castling, ep square,
+        #  white score, black score, turn, hash, halfmove clock)
+        self.history = []
+
+    @property
+    def fullmove_number(self):
+        '''Starts at 1 and goes up after each black move, like in FEN and PGN'''
+        return (self.start_ply + len(self.history)) // 2 + 1
+
+    @property
+    def pieces(self):
+        '''The board as a 2d list of piece objects, for the GUI and the piece classes' can_move.
+        It is a view made from self.board (the shared piece objects, nothing new is built), changing it does nothing'''
+        return BoardView(self.board)
+
+    def copy(self):
+        '''An independent copy of the game (for searching or analysing without touching this one)'''
+        game = Game.__new__(Game)
+        game.__dict__.update(self.__dict__)
+        game.board = self.board[:]
+        game.bitboards = self.bitboards.copy()
+        game.king_squares = self.king_squares[:]
+        game.white_captures = self.white_captures[:]
+        game.black_captures = self.black_captures[:]
+        game.history = self.history[:]
+        return game
+
+    def reset(self):
+        '''Resets for a new game by taking back every move, so no pieces are rebuilt'''
+        while self.history:
+            self.unmake_move()
+        self.result = None # A timeout can end a game before anything was moved
+        self.winner = None
+
+    def initialize_pieces(self):
+        '''Fills the flat board (self.board, one byte per square, the internal state of the game) with the starting position'''
+        pieces = [[Rook('black'),Knight('black'), Bishop('black'), Queen('black'), King('black'), Bishop('black'), Knight('black'), Rook('black')],\
+                        [Pawn('black'), Pawn('black'), Pawn('black'), Pawn('black'), Pawn('black'), Pawn('black'), Pawn('black'), Pawn('black')],\
+                        [Empty(), Empty(), Empty(), Empty(), Empty(), Empty(), Empty(), Empty()],\
+                        [Empty(), Empty(), Empty(), Empty(), Empty(), Empty(), Empty(), Empty()],\
+                        [Empty(), Empty(), Empty(), Empty(), Empty(), Empty(), Empty(), Empty()],\
+                        [Empty(), Empty(), Empty(), Empty(), Empty(), Empty(), Empty(), Empty()],\
+                        [Pawn('white'), Pawn('white'), Pawn('white'), Pawn('white'), Pawn('white'), Pawn('white'), Pawn('white'), Pawn('white')],\
+                        [Rook('white'),Knight('white'), Bishop('white'), Queen('white'), King('white'), Bishop('white'), Knight('white'), Rook('white')]]
+        self.board = bytearray(piece_code(piece) for row in pieces for piece in row)
+
+    def can_select(self, row, col):
+        '''True if the square holds a piece belonging to the side to move'''
+        code = self.board[square(row, col)]
+        return code != EMPTY_CODE and code // 6 == COLORS[self.turn]
+
+    def in_check(self, color=None):
+        '''True if the king of color (default: the side to move) is attacked'''
+        color = COLORS[color or self.turn]
+        return self.bitboards.is_attacked(self.king_squares[color], color ^ 1)
+
+    def piece_moves(self, row, col):
+        '''Lazily yields (row, col) for every square the piece at (row, col) can legally move to'''
+        start = square(row, col)
+        code = self.board[start]
+        color = COLORS[self.turn]
+        if code == EMPTY_CODE or code // 6 != color:
+            return
+        # Only this piece's moves are generated and checked, not the whole side's
+        for end in self.bitboards.moves_from(start):
+            if self._is_legal(start, end, color):
+                yield row_col(end)
+        kind = code % 6
+        ep_square = self.ep_square
+        if kind == PAWN and ep_square is not None and PAWN_ATTACKS[color][start] >> ep_square & 1 \
+                and self._is_legal(start, ep_square, color):
+            yield row_col(ep_square)
+        elif kind == KING:
+            for right, castle in CASTLES.items():
+                if self.castling & right and castle[0] == color and castle[1] == start and self._can_castle(castle):
+                    yield row_col(castle[2])
+
+    def generate_moves(self):
+        '''Lazily yields (start, end, promotion) for every legal move of the side to move.
+        start and end are square numbers (row * 8 + col), promotion is a piece kind or None'''
+        color = COLORS[self.turn]
+        for start, end, promotion in self.bitboards.generate_moves(color, self.ep_square):
+            if self._is_legal(start, end, color):
+                yield start, end, promotion
+        for right, castle in CASTLES.items():
+            if self.castling & right and castle[0] == color and self._can_castle(castle):
+                yield castle[1], castle[2], None
+
+    def _is_legal(self, start, end, color):
+        '''True if moving start -> end does not leave color's own king attacked.
+        Only asks the bitboards "what if", nothing is moved'''
+        bitboards = self.bitboards
+        king = self.king_squares[color]
+        occupied = (bitboards.occupied & ~(1 << start)) | (1 << end)
+        captured = 1 << end
+        if end == self.ep_square and bitboards.boards[color * 6 + PAWN] >> start & 1:
+            captured = 1 << (end + 8 if color == WHITE else end - 8)
+            occupied &= ~captured
+        if start == king:
+            king = end
+        return not bitboards.is_attacked(king, color ^ 1, occupied, captured)
+
+    def _can_castle(self, castle):
+        '''Castling needs the squares between king and rook empty and the king never in, through or into check'''
+        color, king_start, king_end, rook_start, rook_end, empty, path = castle
+        bitboards = self.bitboards
+        if self.board[king_start] != color * 6 + KING: # So does the king
+            return False
+        if not bitboards.boards[color * 6 + ROOK] >> rook_start & 1: # The rook has to still be there
+            return False
+        for sq in empty:
+            if bitboards.occupied >> sq & 1:
+                return False
+        for sq in path:
+            if bitboards.is_attacked(sq, color ^ 1):
+                return False
+        return True
+
+    def move(self, start_row, start_col, end_row, end_col, promotion=QUEEN):
+        '''Plays a move for the side to move if the piece is allowed to make it and it doesn't leave
+        its own king in check. Pawns reaching the last row become promotion (a queen unless told otherwise).
+        Returns True if the move was made, False if it was not valid'''
+        if self.result is not None or not self.can_select(start_row, start_col):
+            return False
+
+        start, end = square(start_row, start_col), square(end_row, end_col)
+        color = COLORS[self.turn]
+        kind = self.board[start] % 6
+        piece = CODE_PIECES[self.board[start]]
+        if kind == KING and start_row == end_row and abs(end_col - start_col) == 2:
+            # Castling depends on the game history so the engine checks it, not the King class
+            if not any(self.castling & right and castle[0] == color and castle[2] == end and self._can_castle(castle)
+                       for right, castle in CASTLES.items()):
+                return False
+        elif kind == PAWN and end == self.ep_square and abs(end_col - start_col) == 1:
+            # En passant also depends on the last move, so the Pawn class can't see it
+            if end_row - start_row != (-1 if color == WHITE else 1):
+                return False
+        elif not piece.can_move(start_row, start_col, end_row, end_col, self.pieces):
+            return False
+        if not self._is_legal(start, end, color):
+            return False
+
+        if kind != PAWN or end_row not in (0, 7):
+            promotion = None
+        self.make_move(start, end, promotion)
+        self.update_status()
+        return True
+
+    def make_move(self, start, end, promotion=None):
+        '''Applies a move in place without checking it (use generate_moves or move for legal ones).
+        Everything needed to take it back goes on the undo stack, see unmake_move'''
+        bitboards = self.bitboards
+        board = self.board
+        color = COLORS[self.turn]
+        code = board[start]
+        kind = code % 6
+
+        # En passant takes the pawn behind the target square
+        captured_sq = end
+        if kind == PAWN and end == self.ep_square:
+            captured_sq = end + 8 if color == WHITE else end - 8
+        target = board[captured_sq]
+        self.history.append((start, end, promotion, code, target, captured_sq, self.castling, self.ep_square,
+                             self.white_score, self.black_score, self.turn, self.hash, self.halfmove_clock))
+        self.halfmove_clock = 0 if kind == PAWN or target != EMPTY_CODE else self.halfmove_clock + 1
+
+        # The hash is updated by XORing out what changes and XORing in what replaces it
+        h = self.hash ^ BLACK_TO_MOVE ^ CASTLING_KEYS[self.castling] ^ PIECE_KEYS[code][start]
+        if self.ep_square is not None:
+            h ^= EP_KEYS[self.ep_square & 7]
+
+        # Update score when capturing a piece
+        if target != EMPTY_CODE:
+            bitboards.remove(color ^ 1, target % 6, captured_sq)
+            h ^= PIECE_KEYS[target][captured_sq]
+            board[captured_sq] = EMPTY_CODE
+            captured = CODE_PIECES[target]
+            if color == WHITE:
+                self.white_score += captured.point
+                self.white_captures.append(captured)
+            else:
+                self.black_score += captured.point
+                self.black_captures.append(captured)
+
+        # Moves the piece (just two bytes on the flat board, nothing new is built)
+        board[end] = code
+        board[start] = EMPTY_CODE
+        bitboards.move(color, kind, start, end)
+        if promotion is not None:
+            bitboards.remove(color, PAWN, end)
+            bitboards.add(color, promotion, end)
+            board[end] = color * 6 + promotion
+        h ^= PIECE_KEYS[board[end]][end]
+        if kind == KING:
+            self.king_squares[color] = end
+            if abs(end - start) == 2: # Castling, so bring the rook over too
+                rook_start, rook_end = (start + 3, start + 1) if end > start else (start - 4, start - 1)
+                self._move_rook(color, rook_start, rook_end)
+                h ^= PIECE_KEYS[color * 6 + ROOK][rook_start] ^ PIECE_KEYS[color * 6 + ROOK][rook_end]
+
+        self.castling &= CASTLE_MASK[start] & CASTLE_MASK[end]
+        self.ep_square = (start + end) // 2 if kind == PAWN and abs(end - start) == 16 else None
+        h ^= CASTLING_KEYS[self.castling]
+        if self.ep_square is not None:
+            h ^= EP_KEYS[self.ep_square & 7]
+        self.hash = h
+        self.other_turn()
+
+    def unmake_move(self):
+        '''Takes back the last move made, returning it as (start, end, promotion)'''
+        (start, end, promotion, code, target, captured_sq, self.castling, self.ep_square,
+         self.white_score, self.black_score, self.turn, self.hash, self.halfmove_clock) = self.history.pop()
+        self.result = None
+        self.winner = None
+        bitboards = self.bitboards
+        board = self.board
+        color = code // 6
+        kind = code % 6
+
+        if promotion is not None:
+            bitboards.remove(color, promotion, end)
+            bitboards.add(color, PAWN, end)
+        bitboards.move(color, kind, end, start)
+        board[start] = code
+        board[end] = EMPTY_CODE
+        if kind == KING:
+            self.king_squares[color] = start
+            if abs(end - start) == 2:
+                rook_start, rook_end = (start + 3, start + 1) if end > start else (start - 4, start - 1)
+                self._move_rook(color, rook_end, rook_start)
+
+        if target != EMPTY_CODE:
+            bitboards.add(color ^ 1, target % 6, captured_sq)
+            board[captured_sq] = target
+            if color == WHITE:
+                self.white_captures.pop()
+            else:
+                self.black_captures.pop()
+        return start, end, promotion
+
+    def _move_rook(self, color, start, end):
+        '''The rook half of castling'''
+        self.bitboards.move(color, ROOK, start, end)
+        self.board[end] = self.board[start]
+        self.board[start] = EMPTY_CODE
+
+    def other_turn(self):
+        '''Switch turns'''
+        self.turn = 'black' if self.turn == 'white' else 'white'
+
+    def update_status(self):
+        '''Checks if the side to move has been checkmated or stalemated, or the position came up three times'''
+        for move in self.generate_moves():
+            break # Any legal move at all means the game goes on
+        else:
+            if self.in_check():
+                self.result = 'checkmate'
+                self.winner = 'black' if self.turn == 'white' else 'white'
+            else:
+                self.result = 'stalemate'
+            return
+        if self.repetition_count() >= 3:
+            self.result = 'repetition'
+
+    def repetition_count(self):
+        '''How many times the current position has occurred, found by comparing hashes on the undo stack.
+        Stops at the last capture or pawn move since nothing before that can repeat'''
+        count = 1
+        for record in reversed(self.history):
+            if record[11] == self.hash:
+                count += 1
+            if record[4] != EMPTY_CODE or record[3] % 6 == PAWN:
+                break
+        return count
+
+    def timeout(self, color):
+        '''The given color ran out of time, so the other side wins'''
+        self.result = 'timeout'
+        self.winner = 'black' if color == 'white' else 'white'
+
+
+class BoardView:
+    '''Read-only 2d view of a flat board: view[row][col] is the shared piece object on that square,
+    so the piece classes and the GUI can keep using board[row][col] like they always have'''
+    __slots__ = ('board',)
+
+    def __init__(self, board):
+        self.board = board
+
+    def __getitem__(self, row):
+        return [CODE_PIECES[code] for code in self.board[row * 8:row * 8 + 8]]
+
+    def __len__(self):
+        return 8
+
+    def __iter__(self):
+        for row in range(8):
+            yield self[row]
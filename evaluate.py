@@ -0,0 +1,211 @@
+#Matthew Jordan and Paul Crowley
+#Static evaluation for Chess: material, piece-square tables (a bonus or penalty for each piece on each square)
+#and mobility (how many squares the knights, bishops, rooks and queens can move to)
+#evaluate() scores one position for the search. evaluate_batch() scores many positions at once as NumPy arrays
+#(N positions x 12 piece planes x 64 squares), for analysis and training data. Both use the same tables
+#NumPy is only needed for the batch functions, the search works without it
+#
+# HOW TO USE:
+#       python evaluate.py positions.fen        prints the score of every position (needs NumPy)
+
+
+import sys
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from pieces import Pawn, Knight, Bishop, Rook, Queen, King
+from bitboard import KNIGHT, BISHOP, ROOK, QUEEN, ROOK_DIRECTIONS, BISHOP_DIRECTIONS, squares
+
+# Centipawns per piece kind (indexed like bitboard.PAWN..KING), taken from the piece classes' point values
+PIECE_VALUES = [piece('white').point * 100 for piece in (Pawn, Knight, Bishop, Rook, Queen, King)]
+
+# Piece-square tables from white's side, written the way the board looks (rank 8 first) which is also
+# the square numbering (a8 = 0). A black piece on sq uses the entry for sq ^ 56, the same square mirrored
+PAWN_TABLE = [
+      0,   0,   0,   0,   0,   0,   0,   0,
+     50,  50,  50,  50,  50,  50,  50,  50,
+     10,  10,  20,  30,  30,  20,  10,  10,
+      5,   5,  10,  25,  25,  10,   5,   5,
+      0,   0,   0,  20,  20,   0,   0,   0,
+      5,  -5, -10,   0,   0, -10,  -5,   5,
+      5,  10,  10, -20, -20,  10,  10,   5,
+      0,   0,   0,   0,   0,   0,   0,   0]
+KNIGHT_TABLE = [
+    -50, -40, -30, -30, -30, -30, -40, -50,
+    -40, -20,   0,   0,   0,   0, -20, -40,
+    -30,   0,  10,  15,  15,  10,   0, -30,
+    -30,   5,  15,  20,  20,  15,   5, -30,
+    -30,   0,  15,  20,  20,  15,   0, -30,
+    -30,   5,  10,  15,  15,  10,   5, -30,
+    -40, -20,   0,   5,   5,   0, -20, -40,
+    -50, -40, -30, -30, -30, -30, -40, -50]
+BISHOP_TABLE = [
+    -20, -10, -10, -10, -10, -10, -10, -20,
+    -10,   0,   0,   0,   0,   0,   0, -10,
+    -10,   0,   5,  10,  10,   5,   0, -10,
+    -10,   5,   5,  10,  10,   5,   5, -10,
+    -10,   0,  10,  10,  10,  10,   0, -10,
+    -10,  10,  10,  10,  10,  10,  10, -10,
+    -10,   5,   0,   0,   0,   0,   5, -10,
+    -20, -10, -10, -10, -10, -10, -10, -20]
+ROOK_TABLE = [
+      0,   0,   0,   0,   0,   0,   0,   0,
+      5,  10,  10,  10,  10,  10,  10,   5,
+     -5,   0,   0,   0,   0,   0,   0,  -5,
+     -5,   0,   0,   0,   0,   0,   0,  -5,
+     -5,   0,   0,   0,   0,   0,   0,  -5,
+     -5,   0,   0,   0,   0,   0,   0,  -5,
+     -5,   0,   0,   0,   0,   0,   0,  -5,
+      0,   0,   0,   5,   5,   0,   0,   0]
+QUEEN_TABLE = [
+    -20, -10, -10,  -5,  -5, -10, -10, -20,
+    -10,   0,   0,   0,   0,   0,   0, -10,
+    -10,   0,   5,   5,   5,   5,   0, -10,
+     -5,   0,   5,   5,   5,   5,   0,  -5,
+      0,   0,   5,   5,   5,   5,   0,  -5,
+    -10,   5,   5,   5,   5,   5,   0, -10,
+    -10,   0,   5,   0,   0,   0,   0, -10,
+    -20, -10, -10,  -5,  -5, -10, -10, -20]
+KING_TABLE = [
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -20, -30, -30, -40, -40, -30, -30, -20,
+    -10, -20, -20, -20, -20, -20, -20, -10,
+     20,  20,   0,   0,   0,   0,  20,  20,
+     20,  30,  10,   0,   0,  10,  30,  20]
+PIECE_TABLES = (PAWN_TABLE, KNIGHT_TABLE, BISHOP_TABLE, ROOK_TABLE, QUEEN_TABLE, KING_TABLE)
+
+# Material plus table bonus for every board code (color * 6 + kind) on every square, from white's side
+# (black pieces count negative). This is the one table both evaluators add up
+SQUARE_SCORES = [[PIECE_VALUES[kind] + PIECE_TABLES[kind][sq] for sq in range(64)] for kind in range(6)] \
+              + [[-PIECE_VALUES[kind] - PIECE_TABLES[kind][sq ^ 56] for sq in range(64)] for kind in range(6)]
+
+# Centipawns per square a piece can move to
+MOBILITY_WEIGHTS = {KNIGHT: 4, BISHOP: 5, ROOK: 2, QUEEN: 1}
+
+
+def evaluate(game, mobility=False):
+    '''Material and piece-square score in centipawns from the side to move's point of view.
+    mobility=True adds the mobility term too (slower, so the search leaves it out)'''
+    score = 0
+    for code, bb in enumerate(game.bitboards.boards):
+        table = SQUARE_SCORES[code]
+        for sq in squares(bb):
+            score += table[sq]
+    if mobility:
+        bitboards = game.bitboards
+        for kind, weight in MOBILITY_WEIGHTS.items():
+            for sq in squares(bitboards.boards[kind]):
+                score += weight * bitboards.targets(sq).bit_count()
+            for sq in squares(bitboards.boards[6 + kind]):
+                score -= weight * bitboards.targets(sq).bit_count()
+    return score if game.turn == 'white' else -score
+
+
+def _rays():
+    '''For every square and the 8 directions (rook ones first), the squares along the ray in order,
+    padded to 7 with 64 (a pretend square that is always occupied)'''
+    rays = []
+    for sq in range(64):
+        row, col = divmod(sq, 8)
+        for dr, dc in ROOK_DIRECTIONS + BISHOP_DIRECTIONS:
+            ray = []
+            r, c = row + dr, col + dc
+            while 0 <= r < 8 and 0 <= c < 8:
+                ray.append(r * 8 + c)
+                r, c = r + dr, c + dc
+            rays.append(ray + [64] * (7 - len(ray)))
+    return rays
+
+
+if np is not None:
+    SQUARE_SCORES_ARRAY = np.array(SQUARE_SCORES, dtype=np.int32) # 12 x 64
+    RAYS = np.array(_rays(), dtype=np.intp).reshape(64, 8, 7)
+    KNIGHT_MOVES = np.zeros((64, 64), dtype=np.int32) # KNIGHT_MOVES[sq, to] is 1 if a knight on sq attacks to
+    for sq in range(64):
+        for row, col in ((-2, -1), (-2, 1), (-1, -2), (-1, 2), (1, -2), (1, 2), (2, -1), (2, 1)):
+            if 0 <= sq // 8 + row < 8 and 0 <= sq % 8 + col < 8:
+                KNIGHT_MOVES[sq, (sq // 8 + row) * 8 + sq % 8 + col] = 1
+
+
+def _need_numpy():
+    if np is None:
+        raise ImportError('the batch evaluator needs NumPy (pip install numpy)')
+
+
+def planes(games):
+    '''N x 12 x 64 array of 0/1, plane color * 6 + kind has a 1 on every square holding that piece'''
+    _need_numpy()
+    boards = np.frombuffer(b''.join(bytes(game.board) for game in games), dtype=np.uint8).reshape(-1, 64)
+    return (boards[:, None, :] == np.arange(12, dtype=np.uint8)[None, :, None]).astype(np.uint8)
+
+
+def _mobility(positions):
+    '''Mobility score (white minus black) for a block of positions'''
+    count = len(positions)
+    pieces = positions.astype(bool)
+    white = pieces[:, :6].any(axis=1)
+    black = pieces[:, 6:].any(axis=1)
+    padding = np.ones((count, 1), dtype=bool)
+    occupied = np.concatenate([white | black, padding], axis=1) # N x 65, square 64 is always occupied
+
+    score = np.zeros(count, dtype=np.int64)
+    for side, own, sign in ((0, white, 1), (6, black, -1)):
+        # Knights: free squares a knight on each square attacks, times where the knights are
+        knight_moves = (~own).astype(np.int32) @ KNIGHT_MOVES.T # N x 64
+        score += sign * MOBILITY_WEIGHTS[KNIGHT] * (positions[:, side + KNIGHT] * knight_moves).sum(axis=1)
+
+        # Sliders: only the rays of the squares that actually hold one are looked at
+        own_padded = np.concatenate([own, padding], axis=1)
+        for kind, directions in ((BISHOP, slice(4, 8)), (ROOK, slice(0, 4)), (QUEEN, slice(0, 8))):
+            position, sq = np.nonzero(positions[:, side + kind])
+            if not len(position):
+                continue
+            rays = RAYS[sq, directions] # K x directions x 7
+            index = position[:, None, None]
+            # A ray square can be reached if every square before it on the ray is empty
+            empty_so_far = np.logical_and.accumulate(~occupied[index, rays], axis=2)
+            reached = np.ones(rays.shape, dtype=bool)
+            reached[:, :, 1:] = empty_so_far[:, :, :-1]
+            moves = (reached & (rays != 64) & ~own_padded[index, rays]).sum(axis=(1, 2)) # Can't land on your own piece
+            score += sign * MOBILITY_WEIGHTS[kind] * np.bincount(position, weights=moves, minlength=count).astype(np.int64)
+    return score
+
+
+def evaluate_batch(positions, white_to_move=None, mobility=True, block=4096):
+    '''Scores N positions given as an N x 12 x 64 array (see planes) in centipawns from white's side,
+    or from the side to move's when white_to_move (N booleans) is given. Matches evaluate() exactly.
+    Works through block positions at a time to keep the temporary arrays small'''
+    _need_numpy()
+    positions = np.asarray(positions)
+    scores = np.einsum('nps,ps->n', positions.astype(np.int32), SQUARE_SCORES_ARRAY).astype(np.int64)
+    if mobility:
+        for start in range(0, len(positions), block):
+            scores[start:start + block] += _mobility(positions[start:start + block])
+    if white_to_move is not None:
+        scores = np.where(np.asarray(white_to_move, dtype=bool), scores, -scores)
+    return scores
+
+
+def main(argv=None):
+    from engine import Game
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 1:
+        print('usage: python evaluate.py positions.fen')
+        return 2
+    with open(argv[0]) as file:
+        fens = [line.strip() for line in file if line.strip() and not line.startswith('#')]
+    games = [Game.from_fen(fen) for fen in fens]
+    scores = evaluate_batch(planes(games), [game.turn == 'white' for game in games])
+    for fen, score in zip(fens, scores):
+        print(f'{score:>6} {fen}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,241 @@
+#Matthew Jordan and Paul Crowley
+#Game database for Chess: games stored in SQLite (one file, nothing to install) with an index from every
+#position's Zobrist hash (engine.Game.hash) to the games that reached it, and a table of how often each move
+#was played from each position and how those games ended. Both are keyed by the hash, so "which games got here"
+#and "what was played here" are single index lookups however many games are stored, no game is replayed
+#
+#Tables:
+#       games       one row per game: players, event, date, result, start FEN and the moves in long algebraic
+#       positions   (hash, game, ply) for every position of every game
+#       moves       (hash, move) -> games, white wins, draws, black wins
+#
+# HOW TO USE:
+#       python gamedb.py ingest games.db games.pgn [more.pgn ...]     add games (read on every core)
+#       python gamedb.py explore games.db [--fen "<fen>"]              move statistics for a position
+#       python gamedb.py games games.db [--fen "<fen>"]                games that reached a position
+#Chess.py shows the explorer for the current position when games.db (next to it) exists
+
+
+import argparse
+import multiprocessing
+import os
+import sqlite3
+import sys
+import time
+from collections import defaultdict
+
+from engine import Game
+from pgn import PgnError, read_games, san_moves, parse_san, result_of, san
+from bitboard import move_name
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS games (
+    id INTEGER PRIMARY KEY,
+    white TEXT, black TEXT, event TEXT, date TEXT, result TEXT,
+    plies INTEGER, fen TEXT, moves TEXT
+);
+CREATE TABLE IF NOT EXISTS positions (
+    hash INTEGER, game INTEGER, ply INTEGER,
+    PRIMARY KEY (hash, game, ply)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS moves (
+    hash INTEGER, move INTEGER, games INTEGER, white INTEGER, draws INTEGER, black INTEGER,
+    PRIMARY KEY (hash, move)
+) WITHOUT ROWID;
+'''
+# How each result adds to the white wins, draws and black wins columns
+RESULT_COUNTS = {'1-0': (1, 0, 0), '1/2-1/2': (0, 1, 0), '0-1': (0, 0, 1), '*': (0, 0, 0)}
+BATCH = 2000 # Games written per transaction while ingesting
+
+
+def signed(key):
+    '''SQLite integers are signed 64 bit, so hashes with the top bit set are stored as negative numbers'''
+    return key - (1 << 64) if key >> 63 else key
+
+
+def encode_move(move):
+    '''A move (start, end, promotion) as one integer: start, end and promotion + 1 (0 for none) in 6 bit fields'''
+    start, end, promotion = move
+    return start | end << 6 | (0 if promotion is None else promotion + 1) << 12
+
+
+def decode_move(code):
+    promotion = code >> 12
+    return code & 63, code >> 6 & 63, None if not promotion else promotion - 1
+
+
+def read_game(item):
+    '''Replays one (headers, movetext) game from pgn.read_games. Returns (headers, start fen, result, moves, hashes)
+    where hashes[i] is the position before moves[i] (plus the final one), or None for a game that can't be read.
+    Runs in the ingest worker processes'''
+    headers, movetext = item
+    try:
+        game = Game.from_fen(headers['FEN']) if 'FEN' in headers else Game()
+        fen = game.fen()
+        moves, hashes = [], [game.hash]
+        for text in san_moves(movetext):
+            move = parse_san(game, text)
+            game.make_move(*move)
+            moves.append(move)
+            hashes.append(game.hash)
+    except (PgnError, ValueError):
+        return None
+    result = headers.get('Result', '*')
+    return headers, fen, result if result in RESULT_COUNTS else '*', moves, hashes
+
+
+class GameDatabase:
+    def __init__(self, path):
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.connection.close()
+
+    def __len__(self):
+        return self.connection.execute('SELECT COUNT(*) FROM games').fetchone()[0]
+
+    def _store(self, games):
+        '''Writes a list of read_game results in one transaction, returns the last game's id'''
+        stats = defaultdict(lambda: [0, 0, 0, 0]) # (hash, move): games, white, draws, black
+        positions = []
+        game_id = None
+        with self.connection:
+            for headers, fen, result, moves, hashes in games:
+                cursor = self.connection.execute(
+                    'INSERT INTO games (white, black, event, date, result, plies, fen, moves) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                    (headers.get('White', '?'), headers.get('Black', '?'), headers.get('Event', '?'), headers.get('Date', '?'),
+                     result, len(moves), fen, ' '.join(move_name(move) for move in moves)))
+                game_id = cursor.lastrowid
+                counts = RESULT_COUNTS[result]
+                played = set() # (hash, move) pairs in this game, a repeated position still counts the game once
+                for ply, key in enumerate(hashes):
+                    positions.append((signed(key), game_id, ply))
+                    if ply < len(moves):
+                        played.add((signed(key), encode_move(moves[ply])))
+                for pair in played:
+                    entry = stats[pair]
+                    entry[0] += 1
+                    entry[1] += counts[0]
+                    entry[2] += counts[1]
+                    entry[3] += counts[2]
+            self.connection.executemany('INSERT INTO positions VALUES (?, ?, ?)', positions)
+            # Moves already in the database get the new counts added on
+            self.connection.executemany(
+                'INSERT INTO moves VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (hash, move) DO UPDATE SET '
+                'games = games + excluded.games, white = white + excluded.white, '
+                'draws = draws + excluded.draws, black = black + excluded.black',
+                [(key, move, *counts) for (key, move), counts in stats.items()])
+        return game_id
+
+    def add_game(self, game, headers=None):
+        '''Stores a game played on an engine.Game (from its first position to now), returns its id'''
+        replay = game.copy()
+        moves = []
+        while replay.history:
+            moves.append(replay.unmake_move())
+        moves.reverse()
+        fen = replay.fen()
+        hashes = [replay.hash]
+        for move in moves:
+            replay.make_move(*move)
+            hashes.append(replay.hash)
+        return self._store([(headers or {}, fen, result_of(game), moves, hashes)])
+
+    def ingest(self, paths, workers=None, chunk=16):
+        '''Adds every game in the PGN files, replayed on a pool of worker processes while this one writes.
+        Games with a bad move are left out. Returns (games added, games skipped)'''
+        added = skipped = 0
+        # Bulk loading: no waiting for the disk after every transaction. A crash part way through can lose
+        # the last batches, ingesting is easy to run again
+        self.connection.execute('PRAGMA synchronous = OFF')
+        with multiprocessing.Pool(workers) as pool:
+            for path in paths:
+                with open(path, encoding='utf-8', errors='replace') as file:
+                    batch = []
+                    for game in pool.imap(read_game, read_games(file), chunksize=chunk):
+                        if game is None:
+                            skipped += 1
+                            continue
+                        batch.append(game)
+                        if len(batch) >= BATCH:
+                            self._store(batch)
+                            added += len(batch)
+                            batch = []
+                    self._store(batch)
+                    added += len(batch)
+        self.connection.execute('PRAGMA synchronous = FULL')
+        self.connection.execute('ANALYZE')
+        return added, skipped
+
+    def move_stats(self, game):
+        '''[(move, games, white wins, draws, black wins)] for the moves played from the game's position,
+        most played first. Only moves that are legal here are returned (hashes are only 64 bits)'''
+        rows = self.connection.execute('SELECT move, games, white, draws, black FROM moves WHERE hash = ? ORDER BY games DESC',
+                                       (signed(game.hash),)).fetchall()
+        legal = set(game.generate_moves())
+        return [(decode_move(code), *counts) for code, *counts in rows if decode_move(code) in legal]
+
+    def count_games(self, game):
+        '''How many games reached the game's position'''
+        return self.connection.execute('SELECT COUNT(DISTINCT game) FROM positions WHERE hash = ?',
+                                       (signed(game.hash),)).fetchone()[0]
+
+    def games_reaching(self, game, limit=20):
+        '''[(id, white, black, event, date, result, ply)] for games that reached the game's position,
+        ply being the first time they did'''
+        return self.connection.execute(
+            'SELECT games.id, white, black, event, date, result, MIN(ply) FROM positions JOIN games ON games.id = positions.game '
+            'WHERE hash = ? GROUP BY games.id ORDER BY games.id LIMIT ?', (signed(game.hash), limit)).fetchall()
+
+    def load(self, game_id):
+        '''The stored game as an engine.Game with all its moves played'''
+        fen, moves = self.connection.execute('SELECT fen, moves FROM games WHERE id = ?', (game_id,)).fetchone()
+        game = Game.from_fen(fen)
+        for text in moves.split():
+            game.make_move(*next(move for move in game.generate_moves() if move_name(move) == text))
+        return game
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Build or search a game database')
+    commands = parser.add_subparsers(dest='command', required=True)
+    ingest = commands.add_parser('ingest', help='add the games in PGN files')
+    ingest.add_argument('database')
+    ingest.add_argument('pgn', nargs='+')
+    ingest.add_argument('--workers', type=int, default=os.cpu_count(), help='processes reading games (default: one per core)')
+    for name, text in (('explore', 'moves played from a position'), ('games', 'games that reached a position')):
+        command = commands.add_parser(name, help=text)
+        command.add_argument('database')
+        command.add_argument('--fen', help='the position (default: the start position)')
+    args = parser.parse_args(argv)
+
+    with GameDatabase(args.database) as database:
+        if args.command == 'ingest':
+            start = time.perf_counter()
+            added, skipped = database.ingest(args.pgn, args.workers)
+            print(f'{added} games added, {skipped} skipped, {time.perf_counter() - start:.1f}s ({len(database)} in the database)')
+            return 0
+
+        game = Game.from_fen(args.fen) if args.fen else Game()
+        start = time.perf_counter()
+        if args.command == 'explore':
+            rows = database.move_stats(game)
+            for move, games, white, draws, black in rows:
+                print(f'{san(game, move):<8} {games:>8} games  +{white} ={draws} -{black}')
+        else:
+            rows = database.games_reaching(game)
+            for game_id, white, black, event, date, result, ply in rows:
+                print(f'{game_id:>8} {white} - {black} {result} ({event}, {date}) at ply {ply}')
+        print(f'{len(rows) if rows else "nothing"} found in {(time.perf_counter() - start) * 1000:.1f} ms')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
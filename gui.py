@@ -0,0 +1,707 @@
+#Matthew Jordan and Paul Crowley
+#The Chess window (PySide6). Split out of Chess.py so the rules can be imported without Qt,
+#run Chess.py to play (it only imports this once the window is needed)
+#Sources:
+#       https://doc.qt.io/qtforpython-6/PySide6/QtWidgets/QGridLayout.html
+#       https://doc.qt.io/qtforpython-6/PySide6/QtCore/QTimer.html
+#       https://www.pythonguis.com/tutorials/pyside6-dialogs/
+#       https://doc.qt.io/qtforpython-6/PySide6/QtCore/QThread.html
+#       https://doc.qt.io/qtforpython-6/PySide6/QtGui/QPainter.html
+
+
+import logging
+import os
+import queue
+import threading
+
+from PySide6.QtWidgets import (QMainWindow,
+                               QPushButton, QGridLayout,
+                               QWidget, QLabel, QDialog,
+                               QDialogButtonBox, QVBoxLayout, QFileDialog)
+from PySide6.QtCore import Qt, QRect, QTimer, QThread, Signal
+from PySide6.QtGui import QColor, QFont, QPainter
+
+from engine import Game
+from search import think_time
+from clock import GameClock
+from bitboard import move_name
+
+log = logging.getLogger('chess') # Quiet unless --log-level says otherwise, printing from the GUI thread blocks it
+
+BOOK_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'book.bin') # Build one with book.py
+GAMES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'games.db') # Build one with gamedb.py ingest
+EXPLORER_MOVES = 12 # Most played moves shown in the explorer
+ANALYSIS_INTERVAL = 0.25 # Seconds between analysis panel updates
+ANALYSIS_LINE = 8 # Moves of the best line shown
+
+# Board colors, made once and reused for every paint
+SQUARE_SIZE = 80
+LIGHT = QColor('#f0d9b5')
+DARK = QColor('#b58863')
+MARK_COLORS = {'selected': QColor('lightgreen'), 'move': QColor('yellow')}
+BORDER = QColor('#000')
+
+
+class Chess(QMainWindow):
+    def __init__(self):
+        super().__init__()
+
+        self.setWindowTitle('Chess Game')
+        self.game = Game() # Board, turn and scores live in the engine, the window just draws them
+
+        self.grid = QGridLayout()
+
+        self.row = None
+        self.col = None
+        self.marks = {} # (row, col): 'selected' or 'move' for every highlighted square
+
+        # Set the time for each player (seconds, plus seconds added per move)
+        self.timer_time = 60
+        self.increment = 0
+        self.chess_clock = GameClock(self.timer_time, self.increment) # Keeps the real time, the QTimer only redraws it
+        self.clock_text = None # What the clock label shows, so it is only updated when it changes
+
+        # Timer setup
+        self.timer = QTimer()
+        self.timer.timeout.connect(self.update_timer)
+        self.timer_running = False  # Flag to manage timer state
+
+        # Computer opponent (off until the Computer button is pressed), it thinks on a separate thread
+        self.computer_color = None
+        self.searcher = None # Made the first time the computer plays (its transposition table is big)
+        self.worker = None
+        self.engine_generation = 0 # Bumped whenever a search result should be thrown away
+
+        # Analysis mode: a worker thread keeps searching the position on the board (Analysis button)
+        self.analysing = False
+        self.analysis_worker = None # Made the first time analysis is turned on, then kept for the whole session
+        self.analysis_generation = 0 # Which position the panel is showing, older results are dropped
+
+        # Playing on a game server (see server.py), set up by connect_online
+        self.online = None
+        self.online_game = None
+        self.online_color = None
+        self.book = None # Opened the first time the computer plays, if book.bin exists
+        self.games_db = None # Opened for the explorer once the board is on screen, if games.db exists
+
+        self.setup_board()
+        self.displays()
+
+        panel = QWidget()
+        panel.setLayout(self.grid)
+        self.setCentralWidget(panel)
+
+    
+
+    
+    @property
+    def pieces(self):
+        '''The engine's 2d list of chess pieces (the internal state of the game)'''
+        return self.game.pieces
+
+    @property
+    def turn(self):
+        return self.game.turn
+
+    def setup_board(self):
+        """ Sets up the board with pieces in their respective starting positions """
+        self.board = BoardWidget() # One widget paints all 64 squares, instead of a button and a label per square
+        self.board.clicked.connect(self.piece_selected) # Connects to the move logic
+        self.board.first_paint.connect(self.update_explorer) # After the first frame so it doesn't slow down startup
+        self.grid.addWidget(self.board, 2, 2, 8, 8)
+        self.refresh_board() # Updates the board with current game state
+
+    def refresh_board(self):
+        '''Refreshes the GUI board to match the state of the internal game (self.pieces)
+        Only squares whose piece changed get repainted (usually just the move's start and end squares)'''
+        pieces = self.pieces
+        icons = self.board.icons
+        for row in range(8):
+            for col in range(8):
+                icon = pieces[row][col].icon
+                if icons[row][col] != icon:
+                    self.board.set_icon(row, col, icon)
+
+    def set_marks(self, marks):
+        '''Changes the highlighted squares to marks ({(row, col): 'selected' or 'move'}),
+        repainting only the squares that were highlighted before or are highlighted now'''
+        for square in self.marks.keys() | marks.keys():
+            if self.marks.get(square) != marks.get(square):
+                self.board.set_mark(square[0], square[1], marks.get(square))
+        self.marks = marks
+
+    def highlight_moves(self, row, col):
+        """ Highlight the selected piece and all of its valid moves """
+        marks = {square: 'move' for square in self.game.piece_moves(row, col)}
+        marks[(row, col)] = 'selected'
+        self.set_marks(marks)
+
+
+    def piece_selected(self, row, col):
+        '''Handles all the logic that comes with managing the buttons being clicked'''
+        if self.turn == self.computer_color:
+            return # The computer is thinking, wait for its move
+        if self.online is not None and self.turn != self.online_color:
+            return # Online it's only our move once the game has started and the opponent has moved
+
+        # If none of the pieces have been selected
+        if self.row is None and self.col is None:
+            if self.game.can_select(row, col):
+                # Start the timer only on the first piece selection
+                if not self.timer_running and self.online is None: # Checks if timer is already running (online the server starts it)
+                    self.chess_clock.start(self.turn)
+                    self.timer.start(100)  # Redraws the clock 10 times a second (calls update_timer), the label only changes when its text does
+                    self.timer_running = True # Prevents the timer from starting again 
+
+                self.row, self.col = row, col
+                log.debug('Selected: %s at (%d, %d)', self.pieces[row][col], row, col)
+                self.highlight_moves(row, col)
+            else:
+                log.debug('Invalid selection. Please select a valid piece.')
+                self.reset_highlight()
+
+        # Makes sures to validate a move if a piece has already been selected
+        else:
+            selected_piece = self.pieces[self.row][self.col]
+
+            if self.game.move(self.row, self.col, row, col):
+                log.info('Moving %s from (%d, %d) to (%d, %d)', selected_piece, self.row, self.col, row, col)
+                if self.online is not None:
+                    self.online.send(type='move', game=self.online_game, move=move_name(self.game.history[-1][:3]))
+                self.after_move()
+            else:
+                log.debug('Invalid move. Please select a valid destination.')
+                self.row, self.col = None, None
+                self.reset_highlight()
+
+    def after_move(self):
+        '''Updates the GUI once the engine has made a move (it already moved the piece, updated the scores and switched turns)'''
+        self.chess_clock.press() # Charges the mover's time (plus increment) and starts the other side's clock
+        self.update_score_display()
+        self.refresh_board()
+        self.reset_highlight()
+
+        # Reset row and column selection
+        self.row, self.col = None, None
+        self.other_turn()
+
+        # check for the end of the game (the engine looks for checkmate, stalemate and repetition after every move)
+        if self.game.result is not None:
+            self.chess_clock.stop()
+            self.update_timer()
+        if self.game.result == 'checkmate':
+            self.timer.stop()
+            self.turn_label.setText(f'{self.game.winner.capitalize()} wins by CHECKMATE')
+        elif self.game.result == 'stalemate':
+            self.timer.stop()
+            self.turn_label.setText('Draw by STALEMATE')
+        elif self.game.result == 'repetition':
+            self.timer.stop()
+            self.turn_label.setText('Draw by REPETITION')
+
+        self.update_explorer()
+        self.start_computer()
+        self.start_analysis()
+
+    def reset_highlight(self):
+        """ Reset all button highlights to their default board colors """
+        self.set_marks({})
+
+
+    def other_turn(self):
+        """ Update turn label and manage the timer (the engine already switched turns) """
+        # Update the turn label
+        if self.game.in_check():
+            self.turn_label.setText(f"{self.turn.capitalize()}'s Turn (CHECK)")
+        else:
+            self.turn_label.setText(f"{self.turn.capitalize()}'s Turn")
+
+        # Timer will continue running for the active player
+        self.timer_running = True
+
+
+    def update_timer(self):
+        """ Redraw the clock (if what it shows changed) and check whether the player whose turn it is ran out of time """
+        text = f'Black Time: {self.chess_clock.text("black")}\n\n---------\n\nWhite Time: {self.chess_clock.text("white")}'
+        if text != self.clock_text:
+            self.clock_text = text
+            self.clock.setText(text)
+
+        flagged = self.chess_clock.flagged()
+        if flagged is not None and self.game.result is None:
+            self.timer.stop()
+            self.chess_clock.stop()
+            self.game.timeout(flagged)
+            self.stop_computer()
+            self.start_analysis() # Stops it, the game is over
+            self.turn_label.setText(f"{self.game.winner.capitalize()} Wins by Timeout!")
+
+                
+
+    def displays(self):
+        '''Creates the other elements on the GUI, not the board but clock score etc..'''
+        self.grid.addWidget(QLabel(), 0, 2, 1, 8)
+
+        # Black score
+        self.black_score_label = QLabel(f'Black Score: {self.game.black_score}')
+        self.black_score_label.setStyleSheet('border: 2px solid white; font-size: 25px; text-align: center; padding: 10px;')
+        self.grid.addWidget(self.black_score_label, 1, 2, 1, 4)
+
+        # White score
+        self.white_score_label = QLabel(f'White Score: {self.game.white_score}')
+        self.white_score_label.setStyleSheet('border: 2px solid white; font-size: 25px; text-align: center; padding: 10px;')
+        self.grid.addWidget(self.white_score_label, 11, 2, 1, 4)
+
+        self.grid.addWidget(QLabel(), 2, 0, 8, 1)
+        # Timer display
+        self.clock = QLabel()
+        self.clock.setStyleSheet('border: 2px solid white; font-size: 30px; padding: 10px;')
+        self.grid.addWidget(self.clock, 3, 1, 6, 1)
+        self.update_timer() # Shows the starting times
+
+        # Turn display
+        self.turn_label = QLabel(f"White's Turn")
+        self.turn_label.setStyleSheet('border: 2px solid white; font-size: 30px; font-weight: bold; text-align: center; padding: 10px;')
+        self.grid.addWidget(self.turn_label, 1, 6, 1, 4)
+
+        # Restart button
+        restart = QPushButton('Restart Game')
+        restart.setStyleSheet('background-color: red; color: white; font-size: 25px; padding: 10px;')
+        self.grid.addWidget(restart, 11, 6, 1, 4)
+        restart.clicked.connect(self.clicked_restart)
+
+        # Takeback button (undoes the last move)
+        takeback = QPushButton('Take Back Move')
+        takeback.setStyleSheet('background-color: gray; color: white; font-size: 25px; padding: 10px;')
+        self.grid.addWidget(takeback, 12, 6, 1, 4)
+        takeback.clicked.connect(self.clicked_takeback)
+
+        # Computer opponent toggle (the computer plays black)
+        self.computer_button = QPushButton('Computer: Off')
+        self.computer_button.setStyleSheet('background-color: gray; color: white; font-size: 25px; padding: 10px;')
+        self.grid.addWidget(self.computer_button, 12, 2, 1, 4)
+        self.computer_button.clicked.connect(self.clicked_computer)
+
+        # Analysis mode toggle (the engine keeps searching the current position and shows what it finds)
+        self.analysis_button = QPushButton('Analysis: Off')
+        self.analysis_button.setStyleSheet('background-color: gray; color: white; font-size: 25px; padding: 10px;')
+        self.grid.addWidget(self.analysis_button, 13, 2, 1, 4)
+        self.analysis_button.clicked.connect(self.clicked_analysis)
+
+        # Save button (writes the game so far as a PGN file)
+        save = QPushButton('Save Game')
+        save.setStyleSheet('background-color: gray; color: white; font-size: 25px; padding: 10px;')
+        self.grid.addWidget(save, 13, 6, 1, 4)
+        save.clicked.connect(self.clicked_save)
+        
+        # Opening explorer (what was played from this position in games.db)
+        self.explorer = QLabel()
+        self.explorer.setStyleSheet('border: 2px solid white; font-family: monospace; font-size: 18px; padding: 10px;')
+        self.explorer.setAlignment(Qt.AlignTop)
+        self.grid.addWidget(self.explorer, 2, 11, 8, 1)
+
+        # Analysis panel (filled in while analysis mode is on)
+        self.analysis_panel = QLabel()
+        self.analysis_panel.setStyleSheet('border: 2px solid white; font-family: monospace; font-size: 18px; padding: 10px;')
+        self.analysis_panel.setAlignment(Qt.AlignTop)
+        self.analysis_panel.setWordWrap(True)
+        self.grid.addWidget(self.analysis_panel, 10, 11, 4, 1)
+
+        self.grid.addWidget(QLabel(), 2, 12)
+        self.grid.addWidget(QLabel(), 2, 13)
+
+    def update_score_display(self):
+        """ Update the score labels. Once a side has captured something its label shows the captured icons """
+        if self.game.black_captures:
+            black_icons = ''.join(piece.icon for piece in self.game.black_captures)
+            self.black_score_label.setText(f'{black_icons}: {self.game.black_score}')
+        else:
+            self.black_score_label.setText(f'Black Score: {self.game.black_score}')
+        if self.game.white_captures:
+            white_icons = ''.join(piece.icon for piece in self.game.white_captures)
+            self.white_score_label.setText(f'{white_icons}: {self.game.white_score}')
+        else:
+            self.white_score_label.setText(f'White Score: {self.game.white_score}')
+
+
+    def clicked_restart(self):
+        '''Sets up/resets all the info for a new game'''
+        if self.online is not None:
+            return # The server owns an online game
+        dialog = DialogConfirmation()
+        if dialog.exec():
+            # Resets the game (pieces, turn and scores)
+            self.stop_computer()
+            self.game.reset()
+            self.row, self.col = None, None
+            self.refresh_board() # Refreshes the GUI 
+            self.reset_highlight()
+            self.update_score_display()
+
+            # Resets both clocks to the starting time
+            self.chess_clock.reset()
+            self.timer.stop()  # Stop's timer
+            self.timer_running = False  # Reset's timer 
+
+            # Update the clock display
+            self.update_timer()
+
+            # Reset the turn label
+            self.turn_label.setText(f"White's Turn")
+            self.update_explorer()
+            self.start_analysis()
+
+
+
+    def clicked_takeback(self):
+        '''Undoes the last move using the engine's undo stack (against the computer, its reply too)'''
+        if not self.game.history or self.game.result == 'timeout' or self.online is not None:
+            return
+        self.stop_computer()
+        self.game.unmake_move()
+        if self.turn == self.computer_color and self.game.history:
+            self.game.unmake_move()
+        self.row, self.col = None, None
+        self.refresh_board()
+        self.reset_highlight()
+        self.update_score_display()
+        self.other_turn()
+        self.update_explorer()
+        self.start_analysis()
+        if self.timer_running: # The clock goes back to the side to move (also restarts it after a checkmate)
+            self.chess_clock.start(self.turn)
+            self.timer.start(100)
+
+    def clicked_analysis(self):
+        '''Turns analysis mode on or off'''
+        self.analysing = not self.analysing
+        self.analysis_button.setText(f'Analysis: {"On" if self.analysing else "Off"}')
+        if self.analysing and self.analysis_worker is None:
+            from search import Searcher
+            from tablebase import Tablebase
+            # Its own searcher, so it never shares a transposition table with the computer opponent's thread
+            self.analysis_worker = AnalysisWorker(Searcher(tablebase=Tablebase()))
+            self.analysis_worker.info.connect(self.analysis_info) # Queued back onto the GUI thread
+            self.analysis_worker.start()
+        self.start_analysis()
+
+    def start_analysis(self):
+        '''Restarts the analysis on the position now on the board. Never waits for the worker: the old search is
+        told to stop, and anything it still sends is dropped because its generation is out of date'''
+        self.analysis_generation += 1
+        if self.analysis_worker is None:
+            return
+        if not self.analysing:
+            self.analysis_worker.analyse(None, self.analysis_generation) # Just stops the search
+            self.analysis_panel.setText('')
+        elif self.game.result is not None:
+            self.analysis_worker.analyse(None, self.analysis_generation)
+            self.analysis_panel.setText('Analysis\n\ngame over')
+        elif self.turn == self.computer_color:
+            # Paused while the computer thinks, two searches at once would halve its speed
+            self.analysis_worker.analyse(None, self.analysis_generation)
+            self.analysis_panel.setText('Analysis\n\ncomputer is thinking')
+        else:
+            self.analysis_worker.analyse(self.game.copy(), self.analysis_generation)
+            self.analysis_panel.setText('Analysis\n\nthinking...')
+
+    def analysis_info(self, result):
+        '''Shows one update from the analysis worker: depth, score (from white's side), speed and the best line'''
+        generation, info = result
+        if generation != self.analysis_generation:
+            return # From a position that's no longer on the board
+        from search import MATE, MAX_DEPTH
+        from pgn import san
+        score = info['score'] if self.turn == 'white' else -info['score']
+        if abs(score) >= MATE - MAX_DEPTH:
+            plies = MATE - abs(score)
+            score_text = f'{"" if score > 0 else "-"}#{(plies + 1) // 2}'
+        else:
+            score_text = f'{score / 100:+.2f}'
+        replay = self.game.copy()
+        words = []
+        for move in info['line'][:ANALYSIS_LINE]:
+            if replay.turn == 'white' or not words:
+                words.append(f'{replay.fullmove_number}.' if replay.turn == 'white' else f'{replay.fullmove_number}...')
+            words.append(san(replay, move))
+            replay.make_move(*move)
+        nps = info['nodes'] / info['seconds'] if info['seconds'] else 0
+        self.analysis_panel.setText(f'Analysis  depth {info["depth"]}\n\n{score_text}   {nps / 1000:.1f}k nodes/s\n\n{" ".join(words)}')
+
+    def closeEvent(self, event):
+        '''Ends the worker threads before the window goes (Qt aborts on a QThread destroyed while running)'''
+        self.stop_computer()
+        if self.analysis_worker is not None:
+            self.analysis_worker.finish()
+            self.analysis_worker.wait()
+        super().closeEvent(event)
+
+    def update_explorer(self):
+        '''Shows the moves played from the current position in games.db, with how often and how well they scored
+        for the side playing them. One indexed query, quick enough to run on every move'''
+        if self.games_db is None:
+            if not os.path.exists(GAMES_PATH):
+                self.explorer.setText('Explorer\n\nno games.db\n(python gamedb.py ingest)')
+                return
+            from gamedb import GameDatabase
+            self.games_db = GameDatabase(GAMES_PATH)
+        from pgn import san
+        stats = self.games_db.move_stats(self.game)
+        total = sum(row[1] for row in stats)
+        lines = [f'Explorer: {total} games', '']
+        for move, games, white, draws, black in stats[:EXPLORER_MOVES]:
+            wins = white if self.turn == 'white' else black
+            lines.append(f'{san(self.game, move):<7} {games:>7} {(wins + draws / 2) / games:>5.0%}')
+        if not stats:
+            lines.append('no games here')
+        self.explorer.setText('\n'.join(lines))
+
+    def clicked_save(self):
+        '''Asks for a file name and saves the moves played so far in PGN'''
+        path, selected = QFileDialog.getSaveFileName(self, 'Save Game', 'game.pgn', 'PGN files (*.pgn)')
+        if path:
+            headers = {'White': 'Computer' if self.computer_color == 'white' else 'Player',
+                       'Black': 'Computer' if self.computer_color == 'black' else 'Player'}
+            from pgn import write_game
+            with open(path, 'w') as file:
+                file.write(write_game(self.game, headers))
+
+    def clicked_computer(self):
+        '''Turns the computer opponent on or off'''
+        if self.online is not None:
+            return
+        if self.computer_color is None:
+            self.computer_color = 'black'
+            self.computer_button.setText('Computer: Black')
+            self.start_computer()
+        else:
+            self.stop_computer()
+            self.computer_color = None
+            self.computer_button.setText('Computer: Off')
+
+    def connect_online(self, host, port, game_id=None):
+        '''Plays on a game server instead of hot-seat: starts a new game there (we play white),
+        or joins game_id (we play black). The server checks every move and keeps the real clocks'''
+        from online import ServerConnection # QtNetwork is only loaded for online play
+        self.online = ServerConnection(host, port)
+        self.online.message.connect(self.server_message)
+        if game_id is None:
+            self.online.connected.connect(lambda: self.online.send(type='new', base=self.timer_time, increment=self.increment))
+        else:
+            self.online.connected.connect(lambda: self.online.send(type='join', game=game_id))
+        self.turn_label.setText(f'Connecting to {host}:{port}...')
+
+    def server_message(self, message):
+        '''Handles one message from the game server'''
+        kind = message.get('type')
+        if kind == 'created':
+            self.online_game = message['game']
+            self.turn_label.setText(f"Game {self.online_game}: waiting for an opponent")
+        elif kind == 'start':
+            self.online_game, self.online_color = message['game'], message['color']
+            self.setWindowTitle(f'Chess Game {self.online_game} (playing {self.online_color})')
+            self.chess_clock.set(message['clocks']['white'], message['clocks']['black'], 'white')
+            self.timer.start(100)
+            self.timer_running = True
+            self.other_turn()
+        elif kind == 'move':
+            if message['fen'] != self.game.fen(): # The opponent's move (ours was already played when we sent it)
+                from server import parse_move
+                start, end, promotion = parse_move(message['move'])
+                self.game.move(*divmod(start, 8), *divmod(end, 8), promotion)
+                self.after_move()
+            # The server's clocks are the real ones
+            clocks = message['clocks']
+            self.chess_clock.set(clocks['white'], clocks['black'], self.turn if self.game.result is None else None)
+        elif kind == 'end':
+            self.timer.stop()
+            self.chess_clock.set(message['clocks']['white'], message['clocks']['black'])
+            self.update_timer()
+            if self.game.result is None: # Checkmate/stalemate/repetition were already shown by after_move
+                self.game.result, self.game.winner = message['reason'], message['winner']
+                if message['winner'] is None:
+                    self.turn_label.setText(f"Game over ({message['reason']})")
+                else:
+                    self.turn_label.setText(f"{message['winner'].capitalize()} Wins ({message['reason']})")
+        elif kind == 'error':
+            log.warning('Server: %s', message['message'])
+
+    def start_computer(self):
+        '''Starts the computer thinking on a worker thread if it is its turn'''
+        if self.computer_color != self.turn or self.game.result is not None:
+            return
+        self.stop_computer()
+        if self.searcher is None:
+            # Imported and made here rather than at startup, most games never need them
+            from search import Searcher
+            from tablebase import Tablebase
+            from book import OpeningBook
+            self.searcher = Searcher(tablebase=Tablebase()) # Tables are only read if tablebase.py generate was run
+            self.book = OpeningBook(BOOK_PATH) if os.path.exists(BOOK_PATH) else None # Opening moves without searching
+        if self.book is not None:
+            move = self.book.choose(self.game)
+            if move is not None:
+                # Played from the event loop (not from inside after_move) like a search result would be
+                result = (self.engine_generation, move)
+                QTimer.singleShot(0, lambda: self.computer_moved(result))
+                return
+        seconds = think_time(self.chess_clock.remaining(self.turn), self.chess_clock.increment)
+        self.worker = EngineWorker(self.searcher, self.game.copy(), seconds, self.engine_generation)
+        self.worker.move_found.connect(self.computer_moved) # Queued back onto the GUI thread
+        self.worker.start()
+
+    def stop_computer(self):
+        '''Stops any search in progress and makes sure its move is ignored'''
+        self.engine_generation += 1
+        if self.worker is not None:
+            self.worker.stop_event.set()
+            self.worker.wait()
+            self.worker = None
+
+    def computer_moved(self, result):
+        '''Plays the move the worker found, unless the game changed while it was thinking'''
+        generation, move = result
+        if generation != self.engine_generation or move is None:
+            return
+        start, end, promotion = move
+        if self.game.move(*divmod(start, 8), *divmod(end, 8), promotion):
+            log.info('Computer moves %s from %s to %s', self.pieces[end // 8][end % 8], divmod(start, 8), divmod(end, 8))
+            self.after_move()
+
+
+
+class BoardWidget(QWidget):
+    '''The board as a single widget that paints its own squares, highlights and piece symbols.
+    A click on a square comes out of the clicked signal as (row, col)'''
+    clicked = Signal(int, int)
+    first_paint = Signal() # Emitted once, when the board is first drawn (for the startup time)
+
+    def __init__(self):
+        super().__init__()
+        self.setFixedSize(8 * SQUARE_SIZE, 8 * SQUARE_SIZE)
+        self.icons = [[''] * 8 for row in range(8)]
+        self.marks = {} # (row, col): 'selected' or 'move'
+        self.piece_font = QFont() # Not self.font, that would hide QWidget.font()
+        self.piece_font.setPixelSize(50)
+        self.painted = False
+
+    def square_rect(self, row, col):
+        return QRect(col * SQUARE_SIZE, row * SQUARE_SIZE, SQUARE_SIZE, SQUARE_SIZE)
+
+    def set_icon(self, row, col, icon):
+        self.icons[row][col] = icon
+        self.update(self.square_rect(row, col)) # Qt repaints just that square (merged with any others) later
+
+    def set_mark(self, row, col, mark):
+        if mark is None:
+            self.marks.pop((row, col), None)
+        else:
+            self.marks[(row, col)] = mark
+        self.update(self.square_rect(row, col))
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.setFont(self.piece_font)
+        area = event.rect()
+        for row in range(8):
+            for col in range(8):
+                rect = self.square_rect(row, col)
+                if not area.intersects(rect):
+                    continue # Only the squares that asked for a repaint
+                mark = self.marks.get((row, col))
+                color = MARK_COLORS[mark] if mark else LIGHT if (row + col) % 2 == 0 else DARK
+                painter.fillRect(rect, color)
+                painter.setPen(BORDER)
+                painter.drawRect(rect.adjusted(0, 0, -1, -1))
+                if self.icons[row][col]:
+                    painter.drawText(rect, Qt.AlignCenter, self.icons[row][col])
+        painter.end()
+        if not self.painted:
+            self.painted = True
+            self.first_paint.emit()
+
+    def mousePressEvent(self, event):
+        position = event.position()
+        row, col = int(position.y()) // SQUARE_SIZE, int(position.x()) // SQUARE_SIZE
+        if 0 <= row < 8 and 0 <= col < 8:
+            self.clicked.emit(row, col)
+
+
+
+class EngineWorker(QThread):
+    '''Runs the search off the Qt event loop so the clock and board stay responsive.
+    The move comes back through the move_found signal, which Qt delivers on the GUI thread'''
+    move_found = Signal(object)
+
+    def __init__(self, searcher, game, seconds, generation):
+        super().__init__()
+        self.searcher = searcher
+        self.game = game # A copy, the search makes/unmakes moves on it
+        self.seconds = seconds
+        self.generation = generation
+        self.stop_event = threading.Event() # Set by the GUI to cut the search short
+
+    def run(self):
+        move, score, depth = self.searcher.search(self.game, think_time=self.seconds, stop_event=self.stop_event)
+        self.move_found.emit((self.generation, move))
+
+
+
+class AnalysisWorker(QThread):
+    '''Keeps searching whatever position it was last given, for as long as it takes, on one thread for the
+    whole session. analyse() hands it a new position and returns straight away: the search in progress is
+    stopped through its stop event and the newest position is started on. Updates come out of the info signal
+    as (generation, info dict from Searcher.search), at most every ANALYSIS_INTERVAL seconds'''
+    info = Signal(object)
+
+    def __init__(self, searcher):
+        super().__init__()
+        self.searcher = searcher
+        self.jobs = queue.Queue() # (game or None, generation, stop event), None stops without starting a new search
+        self.stop_event = threading.Event()
+
+    def analyse(self, game, generation):
+        '''Called from the GUI thread'''
+        self.stop_event.set()
+        # A fresh event for every job, so a search the worker is just starting still gets stopped by the next call
+        self.stop_event = threading.Event()
+        self.jobs.put((game, generation, self.stop_event))
+
+    def finish(self):
+        self.stop_event.set()
+        self.jobs.put(None)
+
+    def run(self):
+        while True:
+            job = self.jobs.get()
+            while job is not None and not self.jobs.empty(): # Skip straight to the newest position
+                job = self.jobs.get()
+            if job is None:
+                return
+            game, generation, stop_event = job
+            if game is None or stop_event.is_set():
+                continue
+
+            def report(info):
+                if not stop_event.is_set(): # Nobody wants results for an old position
+                    self.info.emit((generation, info))
+            self.searcher.search(game, stop_event=stop_event, info=report, info_interval=ANALYSIS_INTERVAL)
+
+
+
+class DialogConfirmation(QDialog):
+    def __init__(self):
+        super().__init__()
+
+        self.setWindowTitle('Wait a second...')
+
+        dialog_button = QDialogButtonBox.Yes | QDialogButtonBox.Cancel
+        self.buttonBox = QDialogButtonBox(dialog_button)
+        self.buttonBox.accepted.connect(self.accept)
+        self.buttonBox.rejected.connect(self.reject)
+
+        layout = QVBoxLayout()
+        message = QLabel('You are sure?')
+        layout.addWidget(message)
+        layout.addWidget(self.buttonBox)
+        self.setLayout(layout)
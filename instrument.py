@@ -0,0 +1,112 @@
+#Matthew Jordan and Paul Crowley
+#Opt-in instrumentation for Chess: counts and times calls to the hot spots (every piece class's can_move,
+#move generation, the end of game checks, and whatever GUI methods Chess.py adds) and can run cProfile.
+#Nothing is changed until enable() is called, it swaps each function for a timing wrapper and disable()
+#puts the originals back, so when it's off there is no cost at all
+#
+# HOW TO USE:
+#       python Chess.py --instrument                     prints the table when the window closes
+#       python Chess.py --profile chess.prof            cProfile dump (python -m pstats chess.prof to read it)
+#       instrument.enable(), run anything, then print(instrument.summary())   from any other script
+
+
+import cProfile
+import functools
+import inspect
+import time
+from contextlib import contextmanager
+
+import pieces
+import engine
+import bitboard
+
+# (owner, attribute) pairs wrapped by enable()
+TARGETS = [(cls, 'can_move') for cls in (pieces.Pawn, pieces.Knight, pieces.Bishop, pieces.Rook, pieces.Queen, pieces.King)] + [
+    (engine.Game, 'generate_moves'),
+    (engine.Game, 'move'),
+    (engine.Game, 'update_status'), # Checkmate/stalemate/repetition checks after every move
+    (engine.Game, 'in_check'),
+    (bitboard.Bitboards, 'is_attacked'),
+]
+
+stats = {} # 'Class.method': [calls, seconds]
+_originals = [] # (owner, attribute, original) for disable()
+
+
+def _wrap(function, name):
+    '''A wrapper adding each call's count and time to stats[name]. Generators are timed while they run,
+    not just when they're created'''
+    record = stats.setdefault(name, [0, 0.0])
+    clock = time.perf_counter
+
+    if inspect.isgeneratorfunction(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            record[0] += 1
+            iterator = function(*args, **kwargs)
+            while True:
+                start = clock()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    record[1] += clock() - start
+                    return
+                record[1] += clock() - start
+                yield item
+    else:
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            record[0] += 1
+            start = clock()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                record[1] += clock() - start
+    return wrapper
+
+
+def enable(*extra):
+    '''Wraps every function in TARGETS, plus any extra (owner, attribute) pairs. Calling it twice does nothing'''
+    if _originals:
+        return
+    for owner, attribute in TARGETS + list(extra):
+        original = owner.__dict__[attribute] # Only what the class itself defines, never an inherited one
+        _originals.append((owner, attribute, original))
+        setattr(owner, attribute, _wrap(original, f'{owner.__name__}.{attribute}'))
+
+
+def disable():
+    '''Puts the original functions back'''
+    while _originals:
+        owner, attribute, original = _originals.pop()
+        setattr(owner, attribute, original)
+
+
+def enabled():
+    return bool(_originals)
+
+
+def reset():
+    for record in stats.values():
+        record[0], record[1] = 0, 0.0
+
+
+def summary():
+    '''Table of calls, total time and time per call, slowest total first'''
+    lines = [f'{"function":<28} {"calls":>10} {"seconds":>10} {"us/call":>9}']
+    for name, (calls, seconds) in sorted(stats.items(), key=lambda item: item[1][1], reverse=True):
+        if calls:
+            lines.append(f'{name:<28} {calls:>10} {seconds:>10.3f} {seconds / calls * 1e6:>9.1f}')
+    return '\n'.join(lines)
+
+
+@contextmanager
+def profile(path):
+    '''Runs the body under cProfile and dumps the stats to path (read it with python -m pstats path)'''
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        profiler.dump_stats(path)
@@ -0,0 +1,33 @@
+#Matthew Jordan and Paul Crowley
+#Client side of online play: the Chess window's connection to a game server (server.py).
+#Kept out of gui.py so PySide6's QtNetwork is only loaded when --connect is used
+#
+# HOW TO USE: python Chess.py --connect localhost:8765 [--game 3]
+
+
+import json
+
+from PySide6.QtCore import Signal
+from PySide6.QtNetwork import QTcpSocket
+
+
+class ServerConnection(QTcpSocket):
+    '''JSON lines connection to server.py, every message from the server comes out of the message signal'''
+    message = Signal(object)
+
+    def __init__(self, host, port):
+        super().__init__()
+        self.buffer = b''
+        self.readyRead.connect(self.read_lines)
+        self.connectToHost(host, port)
+
+    def send(self, **message):
+        self.write((json.dumps(message) + '\n').encode())
+
+    def read_lines(self):
+        # A read can end in the middle of a line, the rest is kept for next time
+        self.buffer += bytes(self.readAll())
+        *lines, self.buffer = self.buffer.split(b'\n')
+        for line in lines:
+            if line.strip():
+                self.message.emit(json.loads(line))
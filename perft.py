@@ -0,0 +1,154 @@
+#Matthew Jordan and Paul Crowley
+#Perft ("performance test"): counts every move path to a fixed depth and checks the totals against known
+#reference counts, which catches move generation bugs the hand-written O/X lists in pieces.py never could.
+#Also times the run, so it doubles as the move generation throughput benchmark
+#
+# HOW TO USE:
+#       python perft.py                          runs the whole suite up to depth 3
+#       python perft.py --depth 4                deeper (slower) suite run
+#       python perft.py --fen "<fen>" --depth 3 --divide
+#       python perft.py --save bench.jsonl       appends the throughput numbers so runs can be compared over time
+#       python perft.py --can-move --depth 2     also checks every piece class can_move agrees with the bitboards
+
+
+import argparse
+import json
+import sys
+import time
+
+from engine import Game, START_FEN
+from bitboard import square_name, move_name
+
+# (name, FEN, node counts for depth 1, 2, 3...) from the Chess Programming Wiki "Perft Results" page
+SUITE = [
+    ('start', START_FEN, [20, 400, 8902, 197281, 4865609]),
+    ('kiwipete', 'r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1', [48, 2039, 97862, 4085603]),
+    ('position3', '8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1', [14, 191, 2812, 43238, 674624]),
+    ('position4', 'r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1', [6, 264, 9467, 422333]),
+    ('position5', 'rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8', [44, 1486, 62379, 2103487]),
+    ('position6', 'r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10', [46, 2079, 89890, 3894594]),
+]
+
+
+def perft(game, depth):
+    '''Number of move paths of exactly depth moves from the current position'''
+    if depth <= 0:
+        return 1 # Just the position itself
+    if depth == 1:
+        return sum(1 for move in game.generate_moves()) # Leaves only need counting, not playing
+    nodes = 0
+    for move in list(game.generate_moves()):
+        game.make_move(*move)
+        nodes += perft(game, depth - 1)
+        game.unmake_move()
+    return nodes
+
+
+def divide(game, depth):
+    '''Perft split up by first move, handy for finding which move a wrong count comes from'''
+    counts = {}
+    for move in list(game.generate_moves()):
+        game.make_move(*move)
+        counts[move] = perft(game, depth - 1) if depth > 1 else 1
+        game.unmake_move()
+    return counts
+
+
+def can_move_mismatches(game, depth):
+    '''Walks the tree to depth and at every position compares each piece's can_move answer for all 64 squares
+    with the bitboard move patterns. Returns a description of each mismatch, empty if they all agree'''
+    mismatches = []
+    pieces = game.pieces
+    for start in range(64):
+        piece = pieces[start // 8][start % 8]
+        if piece.color is None:
+            continue
+        targets = game.bitboards.targets(start)
+        for end in range(64):
+            if piece.can_move(start // 8, start % 8, end // 8, end % 8, pieces) != bool(targets >> end & 1):
+                mismatches.append(f'{piece.color} {piece} {square_name(start)}-{square_name(end)}')
+    if depth > 0:
+        for move in list(game.generate_moves()):
+            game.make_move(*move)
+            mismatches += can_move_mismatches(game, depth - 1)
+            game.unmake_move()
+    return mismatches
+
+
+def run_suite(max_depth):
+    '''Runs every suite position up to max_depth, prints a table and returns (all passed, nodes, seconds)'''
+    passed = True
+    total_nodes = 0
+    total_time = 0
+    print(f'{"position":<10} {"depth":>5} {"nodes":>10} {"expected":>10} {"seconds":>8} {"nps":>9}')
+    for name, fen, expected in SUITE:
+        game = Game.from_fen(fen)
+        for depth in range(1, min(max_depth, len(expected)) + 1):
+            start = time.perf_counter()
+            nodes = perft(game, depth)
+            seconds = time.perf_counter() - start
+            total_nodes += nodes
+            total_time += seconds
+            ok = nodes == expected[depth - 1]
+            passed = passed and ok
+            nps = nodes / seconds if seconds else 0
+            print(f'{name:<10} {depth:>5} {nodes:>10} {expected[depth - 1]:>10} {seconds:>8.3f} {nps:>9.0f}'
+                  + ('' if ok else '  FAIL'))
+    return passed, total_nodes, total_time
+
+
+def positive(text):
+    value = int(text)
+    if value < 1:
+        raise argparse.ArgumentTypeError('must be at least 1')
+    return value
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Perft move generation checks and benchmark')
+    parser.add_argument('--depth', type=positive, default=3, help='deepest depth to run (default 3)')
+    parser.add_argument('--fen', help='run a single position instead of the suite')
+    parser.add_argument('--divide', action='store_true', help='with --fen, show the count for each first move')
+    parser.add_argument('--save', help='append the benchmark result as a JSON line to this file')
+    parser.add_argument('--can-move', action='store_true', help='check the piece classes against the bitboards instead')
+    args = parser.parse_args(argv)
+    if args.fen:
+        try:
+            Game.from_fen(args.fen)
+        except ValueError as error:
+            parser.error(str(error))
+
+    if args.can_move:
+        failed = False
+        for name, fen, expected in SUITE if not args.fen else [('fen', args.fen, [])]:
+            mismatches = can_move_mismatches(Game.from_fen(fen), args.depth - 1)
+            print(f'{name:<10} {len(mismatches)} mismatches' + ''.join('\n    ' + m for m in mismatches[:10]))
+            failed = failed or bool(mismatches)
+        return 1 if failed else 0
+
+    if args.fen:
+        game = Game.from_fen(args.fen)
+        start = time.perf_counter()
+        if args.divide:
+            counts = divide(game, args.depth)
+            for move, count in sorted(counts.items(), key=lambda item: move_name(item[0])):
+                print(f'{move_name(move)}: {count}')
+            nodes = sum(counts.values())
+        else:
+            nodes = perft(game, args.depth)
+        seconds = time.perf_counter() - start
+        print(f'nodes {nodes}  time {seconds:.3f}s  nps {nodes / seconds if seconds else 0:.0f}')
+        return 0
+
+    passed, nodes, seconds = run_suite(args.depth)
+    nps = nodes / seconds if seconds else 0
+    print(f'total {nodes} nodes in {seconds:.3f}s = {nps:.0f} nodes per second, ' + ('all passed' if passed else 'FAILED'))
+    if args.save:
+        with open(args.save, 'a') as file:
+            file.write(json.dumps({'time': time.strftime('%Y-%m-%d %H:%M:%S'), 'depth': args.depth,
+                                   'nodes': nodes, 'seconds': round(seconds, 3), 'nps': round(nps), 'passed': passed}) + '\n')
+    return 0 if passed else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,222 @@
+#Matthew Jordan and Paul Crowley
+#PGN (Portable Game Notation) for Chess: writes games with their moves in SAN (standard algebraic notation, e.g. Nf3, exd5, O-O)
+#and reads PGN files one game at a time, so archives of any size can be replayed and checked in constant memory.
+#Every move read is played through engine.Game.move, so it has to pass the piece classes' can_move rules
+#
+# HOW TO USE:
+#       python pgn.py games.pgn             replays and validates every game in the file
+
+
+import re
+import sys
+import time
+
+from engine import Game, START_FEN
+from bitboard import PAWN, KING, QUEEN, EMPTY_CODE, square_name, parse_square, row_col
+
+PIECE_LETTERS = ' NBRQK' # SAN letter for each kind (pawns have none)
+RESULTS = ('1-0', '0-1', '1/2-1/2', '*')
+
+HEADER_RE = re.compile(r'\[(\w+)\s+"((?:[^"\\]|\\.)*)"\]')
+SAN_RE = re.compile(r'^([NBRQK])?([a-h])?([1-8])?x?([a-h][1-8])(?:=?([NBRQ]))?$')
+# Comments in braces or after ';', NAGs like $1, variation brackets, and everything else (moves, numbers, results)
+TOKEN_RE = re.compile(r'\{[^}]*\}|;[^\n]*|\$\d+|[()]|[^\s(){};$]+')
+MOVE_NUMBER_RE = re.compile(r'^\d+\.*')
+
+
+class PgnError(ValueError):
+    '''A game that can't be read or has a move that isn't legal'''
+
+
+def san(game, move):
+    '''SAN for a legal move (start, end, promotion) in the game's current position'''
+    start, end, promotion = move
+    board = game.board
+    code = board[start]
+    kind = code % 6
+    if kind == KING and abs(end - start) == 2:
+        text = 'O-O' if end > start else 'O-O-O'
+    elif kind == PAWN:
+        capture = board[end] != EMPTY_CODE or end == game.ep_square
+        text = (square_name(start)[0] + 'x' if capture else '') + square_name(end)
+        if promotion is not None:
+            text += '=' + PIECE_LETTERS[promotion]
+    else:
+        text = PIECE_LETTERS[kind]
+        # Add the file, rank or both only if another piece of the same kind could also go there
+        others = [other for other, other_end, other_promotion in game.generate_moves()
+                  if other_end == end and other != start and board[other] == code]
+        if others:
+            if all(other % 8 != start % 8 for other in others):
+                text += square_name(start)[0]
+            elif all(other // 8 != start // 8 for other in others):
+                text += square_name(start)[1]
+            else:
+                text += square_name(start)
+        text += ('x' if board[end] != EMPTY_CODE else '') + square_name(end)
+
+    game.make_move(*move)
+    if game.in_check():
+        text += '+' if any(True for reply in game.generate_moves()) else '#'
+    game.unmake_move()
+    return text
+
+
+def parse_san(game, text):
+    '''The legal move (start, end, promotion) a SAN string means in the game's current position'''
+    text = text.rstrip('+#!?')
+    if text in ('O-O', 'O-O-O', '0-0', '0-0-0'):
+        king = game.king_squares[0 if game.turn == 'white' else 1]
+        end = king + 2 if text in ('O-O', '0-0') else king - 2
+        candidates = [move for move in game.generate_moves() if move[0] == king and move[1] == end]
+    else:
+        match = SAN_RE.match(text)
+        if match is None:
+            raise PgnError(f'not a move: {text!r}')
+        letter, from_file, from_rank, destination, promotion = match.groups()
+        kind = PIECE_LETTERS.index(letter) if letter else PAWN
+        end = parse_square(destination)
+        promotion = PIECE_LETTERS.index(promotion) if promotion else None
+        candidates = [move for move in game.generate_moves()
+                      if move[1] == end and game.board[move[0]] % 6 == kind and move[2] == promotion
+                      and (from_file is None or square_name(move[0])[0] == from_file)
+                      and (from_rank is None or square_name(move[0])[1] == from_rank)]
+    if not candidates:
+        raise PgnError(f'illegal move: {text!r}')
+    if len(candidates) > 1:
+        raise PgnError(f'ambiguous move: {text!r}')
+    return candidates[0]
+
+
+def result_of(game):
+    '''The PGN result string for a game'''
+    if game.winner == 'white':
+        return '1-0'
+    if game.winner == 'black':
+        return '0-1'
+    if game.result in ('stalemate', 'repetition'):
+        return '1/2-1/2'
+    return '*'
+
+
+def write_game(game, headers=None):
+    '''The whole game (from its first position to now) as PGN text'''
+    # Take every move back on a copy to find the starting position, then replay it writing SAN
+    replay = game.copy()
+    moves = []
+    while replay.history:
+        moves.append(replay.unmake_move())
+    moves.reverse()
+
+    result = result_of(game)
+    tags = {'Event': '?', 'Site': '?', 'Date': '????.??.??', 'Round': '?', 'White': '?', 'Black': '?', 'Result': result}
+    tags.update(headers or {})
+    start_fen = replay.fen()
+    if start_fen != START_FEN:
+        tags['SetUp'] = '1'
+        tags['FEN'] = start_fen
+    lines = [f'[{key} "{_escape(value)}"]' for key, value in tags.items()]
+    lines.append('')
+
+    words = []
+    for move in moves:
+        if replay.turn == 'white':
+            words.append(f'{replay.fullmove_number}.')
+        elif not words:
+            words.append(f'{replay.fullmove_number}...')
+        words.append(san(replay, move))
+        replay.make_move(*move)
+    words.append(result)
+
+    # Movetext lines are kept under 80 characters
+    line = ''
+    for word in words:
+        if line and len(line) + 1 + len(word) > 79:
+            lines.append(line)
+            line = word
+        else:
+            line = f'{line} {word}' if line else word
+    lines.append(line)
+    return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    '''Backslashes and quotes in a tag value have to be escaped with a backslash'''
+    return str(value).replace('\\', '\\\\').replace('"', '\\"')
+
+
+def read_games(lines):
+    '''Yields (headers, movetext) for one game at a time from any iterable of lines (an open file works),
+    so only the game being read is ever held in memory'''
+    headers = {}
+    movetext = []
+    for line in lines:
+        line = line.strip()
+        if line.startswith('['):
+            if movetext: # A tag after the moves means the next game has started
+                yield headers, '\n'.join(movetext)
+                headers, movetext = {}, []
+            match = HEADER_RE.match(line)
+            if match:
+                headers[match.group(1)] = match.group(2).replace('\\"', '"').replace('\\\\', '\\')
+        elif line and not line.startswith('%'): # Lines starting with % are escaped, not part of the game
+            movetext.append(line)
+    if headers or movetext:
+        yield headers, '\n'.join(movetext)
+
+
+def san_moves(movetext):
+    '''The main line SAN moves in a game's movetext (skips comments, NAGs, variations, move numbers and the result)'''
+    depth = 0
+    for token in TOKEN_RE.findall(movetext):
+        if token == '(':
+            depth += 1
+        elif token == ')':
+            depth -= 1
+        elif depth or token[0] in '{;$' or token in RESULTS:
+            continue
+        else:
+            token = MOVE_NUMBER_RE.sub('', token) # Handles "12." and "12.e4"
+            if token:
+                yield token
+
+
+def replay(headers, movetext):
+    '''Plays a game from read_games through engine.Game.move, raising PgnError on the first bad move.
+    Returns the finished Game'''
+    try:
+        game = Game.from_fen(headers['FEN']) if 'FEN' in headers else Game()
+    except ValueError as error:
+        raise PgnError(f'bad FEN tag: {error}')
+    for text in san_moves(movetext):
+        if game.result == 'repetition':
+            game.result = None # A threefold repetition is a draw the players may claim, they can also play on
+        start, end, promotion = parse_san(game, text)
+        if not game.move(*row_col(start), *row_col(end), promotion or QUEEN):
+            raise PgnError(f'move {game.fullmove_number} {text} was rejected')
+    return game
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        print('usage: python pgn.py games.pgn [more.pgn ...]')
+        return 2
+    games = bad = 0
+    start = time.perf_counter()
+    for path in argv:
+        with open(path, encoding='utf-8', errors='replace') as file:
+            for headers, movetext in read_games(file):
+                games += 1
+                try:
+                    replay(headers, movetext)
+                except PgnError as error:
+                    bad += 1
+                    print(f'{path} game {games} ({headers.get("White", "?")} - {headers.get("Black", "?")}): {error}')
+    seconds = time.perf_counter() - start
+    print(f'{games} games, {bad} invalid, {seconds:.1f}s ({games / seconds if seconds else 0:.0f} games per second)')
+    return 1 if bad else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,280 @@
+#Matthew Jordan and Paul Crowley
+#Piece rules for Chess, split out of Chess.py so they can be used without Qt
+#Each piece knows how it is allowed to move on an 8x8 board (list of lists of pieces)
+#Pieces never change once made, so there is only ever one object per (type, color): Pawn('white') is Pawn('white')
+
+
+class Piece:
+    '''Shared base for the pieces: no per-instance __dict__, and one shared object per (type, color)'''
+    __slots__ = ('color', 'point', 'icon')
+    _shared = {}
+
+    def __new__(cls, color='none'):
+        piece = Piece._shared.get((cls, color))
+        if piece is None:
+            piece = Piece._shared[(cls, color)] = object.__new__(cls)
+        return piece
+
+
+class Pawn(Piece):
+    __slots__ = ()
+
+    def __init__(self, color='none'):
+        self.color = color
+        self.point = 1
+        self.icon = '♟' if self.color == 'black' else '♙'
+
+    def __str__(self):
+        return 'Pawn'
+
+    def __repr__(self):
+        return f"Pawn('{self.color}')"
+
+    def can_move(self, start_row, start_col, end_row, end_col, board):
+        '''TESTING THE MOVES (manual): O means valid, X means not valid 
+            format: White Pawn moves from 0,0 to 1,0 == WP(0,0) -> E(1,0)
+        WP(6,3) -> E(4,3)  O
+        BP(1,4) -> E(3,4)  O
+        WP(4,3) -> BP(3,4) O # white captures black
+        BP(1,3) -> E(3,3)  O
+        WP(3,4) -> E(2,3)  X # en passant is not a Pawn rule, engine.Game allows it right after a double step
+        WP(6,4) -> E(4,4)  O
+        BP(3,3) -> WP(4,4) O # black captures white
+        PAWN PROMOTION is done by engine.Game when a pawn reaches the last row
+        '''
+        # Determines the direction of the color (White would go up +1, black down -1)
+        direction = 1 if self.color == 'black' else -1 
+        # Checks if pawn is moving straight
+        if start_col == end_col:  
+            # Checks for empty square to move forward up ONE
+            if isinstance(board[end_row][end_col], Empty): # If the destination is empty
+                if end_row - start_row == direction: # Move Forward one step/square space
+                    return True
+                # Checks if it can move 2 empty square spaces to on the FIRST move
+                if (self.color == 'white' and start_row == 6 \
+                    or self.color == 'black' and start_row == 1)\
+                    and end_row - start_row == 2 * direction:
+                    # Makes sure the square in between is already empty
+                    return isinstance(board[start_row + direction][start_col], Empty)
+        # Check to see if it can capture one space diagonally 
+        elif abs(end_col - start_col) == 1 and end_row - start_row == direction: 
+            # Makes sure that the piece is an opponents piece, not the same color
+            return board[end_row][end_col].color != self.color and not isinstance(board[end_row][end_col], Empty)
+        # If nothing is valid (Moving to the side, more than 2 spaces at the beginning, etc.), returns as an invalid move
+        return False
+
+
+
+class Rook(Piece):
+    __slots__ = ()
+
+    def __init__(self, color='none'):
+        self.color = color
+        self.point = 5
+        self.icon = '♜' if self.color == 'black' else '♖'
+
+    def __str__(self):
+        return 'Rook'
+
+    def __repr__(self):
+        return f"Rook('{self.color}')"
+
+    def can_move(self, start_row, start_col, end_row, end_col, board):
+        '''TESTING THE MOVES (manual): O means valid, X means not valid 
+            format: White Rook moves from 0,0 to 1,0 == WR(0,0) -> E(1,0)
+        WP(6,0) -> E(4,0)  O # move pawn out of way
+        BP(1,7) -> E(3,7)  O # move pawn out of way
+        WR(7,0) -> E(3,0)  X # cannot through pieces
+        WR(7,0) -> E(5,0)  O
+        BR(0,7) -> E(2,7)  O
+        WR(5,0) -> E(5,3)  O
+        BR(2,7) -> E(2,6)  O
+        WR(5,3) -> BP(1,3) O # captures black
+        BR(2,6) -> WP(6,6) O # captures white
+        CASTLING is done by engine.Game (it needs to know if the king or rook moved before)
+        '''
+        # Checks to see if it can move horizontally 
+        if start_row == end_row:  
+            step = 1 if end_col > start_col else -1 # Determines direction 
+            # Loops over the squares from the start col to the end to see if theres any obstructions
+            for col in range(start_col + step, end_col, step):
+                if not isinstance(board[start_row][col], Empty): 
+                    return False # Blocked from moving
+                # Stop the Rook from friendly firing
+            return board[end_row][end_col].color != self.color # Executes move if everything is valid
+        
+        # Checks if the Rook can move vertically
+        elif start_col == end_col:  # Vertical move
+            step = 1 if end_row > start_row else -1
+            # Loops over the squares from the start col to the end to see if theres any obstructions
+            for row in range(start_row + step, end_row, step):
+                if not isinstance(board[row][start_col], Empty): # Blocked
+                    return False # Blocked from Moving
+            # Stop the Rook from friendly firing...again
+            return board[end_row][end_col].color != self.color # Executes move if everything is valid
+        # If it cannot move either horizontally or vertically, the move becomes invalid
+        return False
+
+
+class Knight(Piece):
+    __slots__ = ()
+
+    def __init__(self, color='none'):
+        self.color = color
+        self.point = 3
+        self.icon = '♞' if self.color == 'black' else '♘'
+
+    def __str__(self):
+        return 'Knight'
+
+    def __repr__(self):
+        return f"Knight('{self.color}')"
+
+    def can_move(self, start_row, start_col, end_row, end_col, board):
+        '''TESTING THE MOVES (manual): O means valid, X means not valid 
+            format: White Rook moves from 0,0 to 1,0 == WR(0,0) -> E(1,0)
+        WKn(7,1) -> E(5,2)  O
+        BKn(0,6) -> E(2,5)  O
+        WKn(5,2) -> E(3,3)  O
+        BKn(2,5) -> WKn(3,3) O # captures white
+        WKn(7,6) -> E(5,6)  X # invalid move location
+        WKn(7,6) -> E(5,5)  O
+        BP(1,4) -> E(3,4)  O
+        WKn(5,5) -> E(3,4)  O # captures black
+        '''
+        # Calculates the absolute difference between rows and columns
+        row_diff = abs(end_row - start_row)
+        col_diff = abs(end_col - start_col)
+        # Returns an L-shape pattern move
+        return (row_diff, col_diff) in [(2, 1), (1, 2)] and board[end_row][end_col].color != self.color
+
+
+class Bishop(Piece):
+    __slots__ = ()
+
+    def __init__(self, color='none'):
+        self.color = color
+        self.point = 3
+        self.icon = '♝' if self.color == 'black' else '♗'
+
+    def __str__(self):
+        return 'Bishop'
+
+    def __repr__(self):
+        return f"Bishop('{self.color}')"
+
+    def can_move(self, start_row, start_col, end_row, end_col, board):
+        '''TESTING THE MOVES (manual): O means valid, X means not valid 
+            format: White Rook moves from 0,0 to 1,0 == WR(0,0) -> E(1,0)
+        WP(6,3) -> E(4,3)  O
+        BP(1,3) -> E(3,3)  O
+        WB(7,2) -> E(3,6)  O
+        BB(0,2) -> E(4,6)  O
+        WB(3,6) -> BB(4,6) X # invalid move
+        WB(3,6) -> BP(1,4) O # capture black
+        BB(4,6) -> WP(6,4) O # capture white
+        WB(1,4) -> BB(0,5) O # capture another black
+        '''
+        # Checks if it's able to move diagonally (equal row and column difference)
+        row_diff = abs(end_row - start_row)
+        col_diff = abs(end_col - start_col)
+        if row_diff == col_diff:  # Diagonal move
+            # Determines the direction of the move for rows and columns
+            step_row = 1 if end_row > start_row else -1
+            step_col = 1 if end_col > start_col else -1
+            # Check for obstructions in its pathway when moving
+            for i in range(1, row_diff):
+                if not isinstance(board[start_row + i * step_row][start_col + i * step_col], Empty):
+                    return False # Blocked move; becomes invalid
+            # Stop the Bishop from friendly firing
+            return board[end_row][end_col].color != self.color # Executes move if everything is valid
+        return False
+
+
+# The Queen's rules are these two, kept as plain functions so that wrapping Rook.can_move or Bishop.can_move
+# (instrument.py does) doesn't count every queen move under the rook and bishop too
+_rook_can_move = Rook.can_move
+_bishop_can_move = Bishop.can_move
+
+
+class Queen(Piece):
+    __slots__ = ()
+
+    def __init__(self, color='none'):
+        self.color = color
+        self.point = 9
+        self.icon = '♛' if self.color == 'black' else '♕'
+
+    def __str__(self):
+        return 'Queen'
+
+    def __repr__(self):
+        return f"Queen('{self.color}')"
+
+    def can_move(self, start_row, start_col, end_row, end_col, board):
+        '''TESTING THE MOVES (manual): O means valid, X means not valid 
+            format: White Rook moves from 0,0 to 1,0 == WR(0,0) -> E(1,0)
+        WP(6,4) -> E(5,4)  O
+        BP(1,3) -> E(3,3)  O
+        WQ(7,3) -> E(4,6)  O # bishop moveset
+        BQ(0,3) -> E(2,3)  O # rook moveset
+        WQ(4,6) -> BP(1,6) O # rook moveset capture black
+        BQ(2,3) -> WP(6,7) O # bishop moveset capture white
+        WQ(1,6) -> E(3,5)  X # knight moveset not valid
+        WQ(1,6) -> E(1,3)  X # cannot move thru pieces
+        '''
+        # Combines the Rook's and Bishop's moves (borrows their rules without building new pieces every call)
+        return _rook_can_move(self, start_row, start_col, end_row, end_col, board) or \
+               _bishop_can_move(self, start_row, start_col, end_row, end_col, board)
+
+
+class King(Piece):
+    __slots__ = ()
+
+    def __init__(self, color='none'):
+        self.point = 0
+        self.color = color
+        self.icon = '♚' if self.color == 'black' else '♔'
+
+    def __str__(self):
+        return 'King'
+
+    def __repr__(self):
+        return f"King('{self.color}')"
+
+    def can_move(self, start_row, start_col, end_row, end_col, board):
+        '''TESTING THE MOVES (manual): O means valid, X means not valid 
+            format: White Rook moves from 0,0 to 1,0 == WR(0,0) -> E(1,0)
+        WP(6,4) -> E(4,4)  O
+        BP(1,4) -> E(3,4)  O
+        WKi(7,4) -> E(6,4) O
+        BQ(0,3) -> E(3,6)  O
+        WKi(6,4) -> E(5,4) O # moving into check: the King allows it but engine.Game rejects it
+        BKi(0,4) -> E(0,3) O
+        WKi(5,4) -> E(5,3) O # same, engine.Game rejects it
+        CASTLING is done by engine.Game (it needs to know if the king or rook moved before)
+        '''
+        # Calculates the absolute difference between rows and columns for the King to move
+        row_diff = abs(end_row - start_row)
+        col_diff = abs(end_col - start_col)
+        # The move is valid if King moves only 1 square in any direction thats empty
+        return max(row_diff, col_diff) == 1 and board[end_row][end_col].color != self.color
+
+
+class Empty(Piece):
+    __slots__ = ()
+
+    def __init__(self):
+        self.point = 0
+        self.color = None
+        self.icon = ''
+
+    def __str__(self):
+        return 'Empty'
+
+    def __repr__(self):
+        return 'Empty()'
+
+    def can_move(self, *args):
+        # Empty square cannot move...obviously
+        return False
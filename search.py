@@ -0,0 +1,259 @@
+#Matthew Jordan and Paul Crowley
+#Computer opponent for Chess: alpha-beta (negamax) search with iterative deepening, quiescence and a time limit
+#Positions are scored by evaluate.py: the piece classes' point values (pawn 1, knight/bishop 3, rook 5, queen 9)
+#plus piece-square tables
+#No Qt in here, Chess.py runs it on a QThread so the clock and the board keep working while it thinks
+
+
+import threading
+import time
+
+from bitboard import PAWN, EMPTY_CODE
+from transposition import TranspositionTable, EXACT, LOWER, UPPER
+from evaluate import evaluate, PIECE_VALUES
+
+MATE = 100000
+MAX_DEPTH = 64
+
+
+class SearchStopped(Exception):
+    '''Raised inside the search when time runs out or stop() is called'''
+
+
+def think_time(remaining, increment=0, moves_to_go=30):
+    '''How many seconds to spend on a move when the side has `remaining` seconds left on its clock'''
+    budget = remaining / moves_to_go + increment * 0.8
+    return max(0.05, min(budget, remaining / 2))
+
+
+class Searcher:
+    def __init__(self, tt_megabytes=16, tablebase=None):
+        self.tt = TranspositionTable(tt_megabytes)
+        self.tablebase = tablebase # A tablebase.Tablebase, gives exact results once only 3 pieces are left
+        self.nodes = 0
+        self.elapsed = 0
+        self.stop_event = threading.Event()
+        self.deadline = None
+        self.info = None
+
+    def stop(self):
+        '''Asks the running search to give up (safe to call from another thread)'''
+        self.stop_event.set()
+
+    def search(self, game, think_time=None, max_depth=MAX_DEPTH, stop_event=None, info=None, info_interval=0.2):
+        '''Searches one ply deeper at a time until max_depth or think_time seconds are used up,
+        or until stop_event is set (a threading.Event, handy when another thread owns the search).
+        The game is searched in place with make/unmake, pass a copy if something else is using it.
+        info, if given, is called with a dict (depth, score, line, nodes, seconds) for the deepest finished
+        iteration at most every info_interval seconds while searching, and once more at the end.
+        Returns (move, score, depth) from the deepest finished iteration, move is (start, end, promotion)'''
+        start_time = time.monotonic()
+        self.start_time = start_time
+        self.deadline = None if think_time is None else start_time + think_time
+        self.stop_event = stop_event if stop_event is not None else threading.Event()
+        self.info, self.info_interval = info, info_interval
+        self.last_info = start_time
+        self.best_line = None
+        self.nodes = 0
+        self.killers = [[None, None] for ply in range(MAX_DEPTH + 1)]
+        self.tt.new_search()
+        self.root_ply = len(game.history)
+
+        if self.tablebase is not None and game.bitboards.occupied.bit_count() <= 3:
+            move = self.tablebase.best_move(game)
+            if move is not None:
+                self.elapsed = time.monotonic() - start_time
+                return move, self._tablebase_score(game, 0), 0
+
+        best = (None, 0, 0)
+        for depth in range(1, max_depth + 1):
+            self.root_move = None
+            try:
+                score = self._negamax(game, depth, -MATE - 1, MATE + 1, 0)
+            except SearchStopped:
+                # Undo whatever the interrupted iteration left on the board
+                while len(game.history) > self.root_ply:
+                    game.unmake_move()
+                break
+            # Taken from the search itself, the table's root entry may have lost its slot to a deeper one
+            move = self.root_move
+            if move is None:
+                break # No legal moves at the root
+            best = (move, score, depth)
+            if info is not None:
+                self.best_line = (depth, score, self.principal_variation(game, move, depth))
+                self._report()
+            if abs(score) >= MATE - MAX_DEPTH:
+                break # Found a forced mate, searching deeper won't change the move
+            if self.deadline is not None and time.monotonic() - start_time > (self.deadline - start_time) / 2:
+                break # The next iteration would almost certainly not finish in time
+        if best[0] is None:
+            # Stopped before even one ply was finished: any legal move beats none
+            move = next(iter(game.generate_moves()), None)
+            best = (move, 0, 0)
+        self.elapsed = time.monotonic() - start_time
+        if info is not None and not self.stop_event.is_set():
+            self._report(final=True)
+        return best
+
+    def principal_variation(self, game, move, length):
+        '''The expected line starting with move: the best moves stored in the table, followed as long as
+        they're legal (the table can have lost or mixed up some) for at most length plies'''
+        line = [move]
+        game.make_move(*move)
+        seen = {game.hash}
+        while len(line) < length:
+            entry = self.tt.probe(game.hash)
+            if entry is None or entry[3] is None or entry[3] not in game.generate_moves():
+                break
+            line.append(entry[3])
+            game.make_move(*entry[3])
+            if game.hash in seen:
+                break # Going round a repetition
+            seen.add(game.hash)
+        for move in line:
+            game.unmake_move()
+        return line
+
+    def _report(self, final=False):
+        '''Sends the deepest finished line to the info callback, unless one was sent less than info_interval ago'''
+        now = time.monotonic()
+        if self.best_line is None or (not final and now - self.last_info < self.info_interval):
+            return
+        self.last_info = now
+        depth, score, line = self.best_line
+        self.info({'depth': depth, 'score': score, 'line': line, 'nodes': self.nodes, 'seconds': now - self.start_time})
+
+    def _tablebase_score(self, game, ply):
+        '''Exact score from the tablebase (mate scores like the search's own), or None if there's no table'''
+        result = self.tablebase.probe(game)
+        if result is None:
+            return None
+        outcome, plies = result
+        return outcome * (MATE - ply - plies) if outcome else 0
+
+    def _check_time(self):
+        if self.stop_event.is_set() or (self.deadline is not None and time.monotonic() > self.deadline):
+            raise SearchStopped
+        if self.info is not None:
+            self._report() # Keeps the node count moving while a deep iteration runs
+
+    def _negamax(self, game, depth, alpha, beta, ply):
+        self.nodes += 1
+        if self.nodes & 127 == 0: # Often enough to stop on time even at a few thousand nodes per second
+            self._check_time()
+        if ply and game.repetition_count() > 1:
+            return 0 # Heading for a repetition is a draw
+        if ply and self.tablebase is not None and game.bitboards.occupied.bit_count() <= 3:
+            score = self._tablebase_score(game, ply)
+            if score is not None:
+                return score
+
+        in_check = game.in_check()
+        if in_check:
+            depth += 1 # Don't stop searching in the middle of a check
+        if depth <= 0:
+            return self._quiesce(game, alpha, beta, ply)
+
+        # Transposition table: maybe this position was already searched deep enough
+        tt_move = None
+        entry = self.tt.probe(game.hash)
+        if entry is not None:
+            entry_depth, value, flag, tt_move = entry
+            value = _from_tt(value, ply)
+            if ply and entry_depth >= depth:
+                if flag == EXACT or (flag == LOWER and value >= beta) or (flag == UPPER and value <= alpha):
+                    return value
+
+        moves = self._ordered_moves(game, tt_move, ply)
+        if not moves:
+            return -MATE + ply if in_check else 0 # Checkmate or stalemate
+
+        original_alpha = alpha
+        best_score = -MATE - 1
+        best_move = None
+        for move in moves:
+            game.make_move(*move)
+            score = -self._negamax(game, depth - 1, -beta, -alpha, ply + 1)
+            game.unmake_move()
+            if score > best_score:
+                best_score, best_move = score, move
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        if game.board[move[1]] == EMPTY_CODE: # Quiet move, remember it as a killer
+                            killers = self.killers[ply]
+                            if killers[0] != move:
+                                killers[1], killers[0] = killers[0], move
+                        break
+
+        if not ply:
+            self.root_move = best_move
+        flag = UPPER if best_score <= original_alpha else LOWER if best_score >= beta else EXACT
+        self.tt.store(game.hash, depth, _to_tt(best_score, ply), flag, best_move)
+        return best_score
+
+    def _quiesce(self, game, alpha, beta, ply):
+        '''Only searches captures (and promotions) so the score isn't taken in the middle of an exchange'''
+        self.nodes += 1
+        if self.nodes & 127 == 0:
+            self._check_time()
+        stand_pat = evaluate(game)
+        if stand_pat >= beta:
+            return stand_pat
+        alpha = max(alpha, stand_pat)
+
+        for move in self._ordered_moves(game, None, None, captures_only=True):
+            game.make_move(*move)
+            score = -self._quiesce(game, -beta, -alpha, ply + 1)
+            game.unmake_move()
+            if score >= beta:
+                return score
+            alpha = max(alpha, score)
+        return alpha
+
+    def _ordered_moves(self, game, tt_move, ply, captures_only=False):
+        '''Legal moves best-first: the table's move, captures of valuable pieces by cheap ones (MVV-LVA),
+        promotions, the killer moves for this ply, then everything else'''
+        board = game.board
+        killers = self.killers[ply] if ply is not None else ()
+        ep_square = game.ep_square
+        scored = []
+        for move in game.generate_moves():
+            start, end, promotion = move
+            target = board[end]
+            attacker = board[start] % 6
+            if target != EMPTY_CODE:
+                score = 10000 + PIECE_VALUES[target % 6] - PIECE_VALUES[attacker] // 100
+            elif end == ep_square and attacker == PAWN:
+                score = 10000 + 99
+            elif promotion is not None:
+                score = 9000 + PIECE_VALUES[promotion]
+            elif captures_only:
+                continue
+            elif move in killers:
+                score = 8000
+            else:
+                score = 0
+            if move == tt_move:
+                score = 100000
+            scored.append((score, move))
+        scored.sort(key=lambda item: item[0], reverse=True)
+        return [move for score, move in scored]
+
+
+def _to_tt(score, ply):
+    '''Mate scores are stored as "mate in n from here" so they stay right when found again at another ply'''
+    if score >= MATE - MAX_DEPTH * 2:
+        return score + ply
+    if score <= -MATE + MAX_DEPTH * 2:
+        return score - ply
+    return score
+
+
+def _from_tt(score, ply):
+    if score >= MATE - MAX_DEPTH * 2:
+        return score - ply
+    if score <= -MATE + MAX_DEPTH * 2:
+        return score + ply
+    return score
@@ -0,0 +1,239 @@
+#Matthew Jordan and Paul Crowley
+#Chess game server: hosts any number of games at once on one asyncio event loop (no thread per game).
+#Players talk to it in JSON lines (one JSON object per line) over TCP. Every move is checked on the server
+#with engine.Game.move (the same piece rules as the GUI) and the server's clocks (clock.GameClock) are the
+#ones that count. One sweep task looks for flagged clocks in every game 10 times a second
+#
+#Messages from a client:
+#       {"type": "new", "base": 60, "increment": 0}       creates a game, the creator plays white
+#       {"type": "join", "game": 3}                        joins game 3 as black, the game (and white's clock) starts
+#       {"type": "list"}                                   games waiting for a second player
+#       {"type": "move", "game": 3, "move": "e2e4"}       moves in long algebraic (e7e8q to promote)
+#       {"type": "resign", "game": 3}
+#Messages from the server: created, games, start, move (with both clocks), end (with result and reason), error
+#
+# HOW TO USE:
+#       python server.py --port 8765
+#       python Chess.py --connect localhost:8765 [--game 3]
+
+
+import argparse
+import asyncio
+import json
+import logging
+import sys
+
+from engine import Game
+from clock import GameClock
+from bitboard import KNIGHT, BISHOP, ROOK, QUEEN, parse_square, row_col, move_name
+from pgn import result_of
+
+log = logging.getLogger('chess')
+
+PROMOTION_LETTERS = {'n': KNIGHT, 'b': BISHOP, 'r': ROOK, 'q': QUEEN}
+SWEEP_SECONDS = 0.1
+
+
+class ProtocolError(ValueError):
+    '''A message the server can't act on, the reason is sent back to the client'''
+
+
+def parse_move(text):
+    '''(start, end, promotion) from long algebraic like e2e4 or e7e8q'''
+    if not isinstance(text, str) or len(text) not in (4, 5) or text[4:] not in ('', 'n', 'b', 'r', 'q') \
+            or any(text[i] not in 'abcdefgh' or text[i + 1] not in '12345678' for i in (0, 2)):
+        raise ProtocolError(f'bad move {text!r}')
+    return parse_square(text[:2]), parse_square(text[2:4]), PROMOTION_LETTERS.get(text[4:], QUEEN)
+
+
+class Player:
+    '''One client connection'''
+    def __init__(self, writer):
+        self.writer = writer
+        self.games = set() # Ids of the games this connection is playing
+
+    def send(self, message):
+        # Only buffered here, the connection's own handler waits for it to drain
+        if not self.writer.is_closing():
+            self.writer.write((json.dumps(message) + '\n').encode())
+
+
+class ServerGame:
+    def __init__(self, game_id, base, increment):
+        self.id = game_id
+        self.game = Game()
+        self.clock = GameClock(base, increment)
+        self.players = {'white': None, 'black': None}
+
+    def clocks(self):
+        return {color: round(self.clock.remaining(color), 3) for color in ('white', 'black')}
+
+    def broadcast(self, message):
+        for player in self.players.values():
+            if player is not None:
+                player.send(message)
+
+
+class ChessServer:
+    def __init__(self, max_base=3600):
+        self.games = {}
+        self.running = set() # Games with a clock running, the only ones the sweep looks at
+        self.next_id = 1
+        self.max_base = max_base
+
+    async def serve(self, host='localhost', port=8765):
+        '''Starts listening and the clock sweep, returns the asyncio server (port 0 picks a free port)'''
+        self.server = await asyncio.start_server(self.handle_client, host, port)
+        self.sweeper = asyncio.create_task(self.sweep())
+        return self.server
+
+    async def close(self):
+        self.sweeper.cancel()
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def sweep(self):
+        '''Ends every game whose side to move has run out of time'''
+        while True:
+            await asyncio.sleep(SWEEP_SECONDS)
+            for game in [self.games[game_id] for game_id in self.running]:
+                flagged = game.clock.flagged()
+                if flagged is not None:
+                    game.game.timeout(flagged)
+                    self.finish(game, 'timeout')
+
+    async def handle_client(self, reader, writer):
+        player = Player(writer)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    message = json.loads(line)
+                    if not isinstance(message, dict):
+                        raise ProtocolError('messages must be JSON objects')
+                    self.handle(player, message)
+                except (ProtocolError, json.JSONDecodeError) as error:
+                    player.send({'type': 'error', 'message': str(error)})
+                except Exception:
+                    # A bug handling one message shouldn't drop the connection (and forfeit the sender's games)
+                    log.exception('Error handling %r', line)
+                    player.send({'type': 'error', 'message': 'internal error'})
+                await writer.drain()
+        except (ConnectionError, ValueError): # ValueError: a line longer than the stream limit
+            pass
+        finally:
+            # Leaving in the middle of a game loses it
+            for game_id in list(player.games):
+                game = self.games.get(game_id)
+                if game is not None:
+                    self.resign(game, player, 'abandoned')
+            writer.close()
+
+    def handle(self, player, message):
+        kind = message.get('type')
+        if kind == 'new':
+            base = message.get('base', 60)
+            increment = message.get('increment', 0)
+            if not all(isinstance(value, (int, float)) for value in (base, increment)) \
+                    or not 0 < base <= self.max_base or not 0 <= increment <= 60:
+                raise ProtocolError('bad time control')
+            game = ServerGame(self.next_id, base, increment)
+            self.next_id += 1
+            self.games[game.id] = game
+            game.players['white'] = player
+            player.games.add(game.id)
+            player.send({'type': 'created', 'game': game.id, 'color': 'white', 'base': base, 'increment': increment})
+        elif kind == 'list':
+            player.send({'type': 'games', 'games': [{'game': game.id, 'base': game.clock.base, 'increment': game.clock.increment}
+                                                    for game in self.games.values() if game.players['black'] is None]})
+        elif kind == 'join':
+            game = self._game(message)
+            if game.players['black'] is not None:
+                raise ProtocolError(f'game {game.id} already has two players')
+            if game.players['white'] is player:
+                raise ProtocolError("you can't play yourself")
+            game.players['black'] = player
+            player.games.add(game.id)
+            game.clock.start('white')
+            self.running.add(game.id)
+            for color, other in game.players.items():
+                other.send({'type': 'start', 'game': game.id, 'color': color, 'fen': game.game.fen(),
+                            'base': game.clock.base, 'increment': game.clock.increment, 'clocks': game.clocks()})
+        elif kind == 'move':
+            game = self._game(message)
+            color = self._color(game, player)
+            if game.id not in self.running:
+                raise ProtocolError(f'game {game.id} has not started')
+            if color != game.game.turn:
+                raise ProtocolError('not your turn')
+            if game.clock.flagged() is not None: # Ran out before the sweep noticed
+                game.game.timeout(color)
+                self.finish(game, 'timeout')
+                return
+            start, end, promotion = parse_move(message.get('move'))
+            if not game.game.move(*row_col(start), *row_col(end), promotion):
+                raise ProtocolError(f'illegal move {message.get("move")}')
+            game.clock.press()
+            game.broadcast({'type': 'move', 'game': game.id, 'move': move_name(game.game.history[-1][:3]),
+                            'fen': game.game.fen(), 'clocks': game.clocks()})
+            if game.game.result is not None:
+                self.finish(game, game.game.result)
+        elif kind == 'resign':
+            game = self._game(message)
+            self.resign(game, player, 'resigned')
+        else:
+            raise ProtocolError(f'unknown message type {kind!r}')
+
+    def _game(self, message):
+        game_id = message.get('game')
+        if not isinstance(game_id, int) or isinstance(game_id, bool):
+            raise ProtocolError(f'bad game id {game_id!r}')
+        game = self.games.get(game_id)
+        if game is None:
+            raise ProtocolError(f'no game {message.get("game")!r}')
+        return game
+
+    def _color(self, game, player):
+        for color, other in game.players.items():
+            if other is player:
+                return color
+        raise ProtocolError(f'you are not playing game {game.id}')
+
+    def resign(self, game, player, reason):
+        color = self._color(game, player)
+        game.game.result = reason
+        game.game.winner = 'black' if color == 'white' else 'white'
+        if game.players['black'] is None: # Nobody joined yet, nothing to win
+            game.game.winner = None
+        self.finish(game, reason)
+
+    def finish(self, game, reason):
+        '''Tells both players the result and forgets the game'''
+        game.clock.stop()
+        self.running.discard(game.id)
+        self.games.pop(game.id, None)
+        game.broadcast({'type': 'end', 'game': game.id, 'result': result_of(game.game), 'reason': reason,
+                        'winner': game.game.winner, 'clocks': game.clocks()})
+        for player in game.players.values():
+            if player is not None:
+                player.games.discard(game.id)
+
+
+async def main(argv=None):
+    parser = argparse.ArgumentParser(description='Chess game server')
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args(argv)
+    server = await ChessServer().serve(args.host, args.port)
+    print(f'serving on {", ".join(str(sock.getsockname()) for sock in server.sockets)}')
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == '__main__':
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        sys.exit(0)
@@ -0,0 +1,234 @@
+#Matthew Jordan and Paul Crowley
+#Endgame tablebases for Chess: perfect results for king + queen or king + rook against a lone king.
+#The tables are worked out backwards from every checkmate (retrograde analysis) and saved to disk once,
+#then read lazily through mmap, a probe only touches the one byte it needs. Probe results are kept in a
+#bounded cache since the search asks about the same positions over and over
+#
+#A table has one byte per (side to move, strong king, strong piece, weak king) position, always stored with
+#white as the strong side (black positions are mirrored). The byte is the number of plies to mate, or DRAW.
+#For the strong side to move that means it wins in that many plies, for the weak side it means it loses
+#
+# HOW TO USE:
+#       python tablebase.py generate            writes KQK.tb and KRK.tb into tablebases/ (takes a little while)
+#       python tablebase.py probe "<fen>"
+
+
+import argparse
+import mmap
+import os
+import sys
+import time
+from collections import OrderedDict
+
+from bitboard import WHITE, BLACK, KNIGHT, BISHOP, ROOK, QUEEN, KING, KING_ATTACKS, attacks, squares
+from engine import Game
+
+TABLEBASE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tablebases')
+TABLES = {QUEEN: 'KQK', ROOK: 'KRK'} # The endings with a table, KBK and KNK are always drawn
+TABLE_SIZE = 2 * 64 * 64 * 64
+DRAW = 255
+WIN, LOSS = 1, -1
+
+
+def index(strong_to_move, strong_king, piece, weak_king):
+    return (0 if strong_to_move else 262144) + strong_king * 4096 + piece * 64 + weak_king
+
+
+def generate(kind):
+    '''Builds the table for king + kind against a king. Returns a bytearray of TABLE_SIZE'''
+    table = bytearray([DRAW]) * TABLE_SIZE
+    legal = bytearray(TABLE_SIZE)
+    moves_left = bytearray(TABLE_SIZE) # Weak side to move: moves not yet known to lose
+    lost = [] # Weak side to move positions that are lost in the current number of plies
+
+    # First pass: which positions can happen, and the checkmates
+    for wk in range(64):
+        for p in range(64):
+            if p == wk:
+                continue
+            for bk in range(64):
+                if bk == wk or bk == p or KING_ATTACKS[wk] >> bk & 1:
+                    continue
+                occupied = 1 << wk | 1 << p | 1 << bk
+                check = attacks(WHITE, kind, p, occupied) >> bk & 1
+                if not check: # The weak king can't be in check when it isn't its move
+                    legal[index(True, wk, p, bk)] = 1
+                weak = index(False, wk, p, bk)
+                legal[weak] = 1
+                # Weak king moves: never next to the other king, never onto an attacked square,
+                # and taking an undefended piece leaves two bare kings, a draw
+                covered = attacks(WHITE, kind, p, occupied & ~(1 << bk)) | KING_ATTACKS[wk]
+                count = 0
+                takes = False
+                for to in squares(KING_ATTACKS[bk] & ~covered):
+                    if to == p:
+                        takes = True
+                    elif to != wk:
+                        count += 1
+                if takes:
+                    continue # Stays a draw
+                if count == 0:
+                    if check:
+                        table[weak] = 0 # Checkmate
+                        lost.append((wk, p, bk))
+                    continue # Stalemate (or mate) is final
+                moves_left[weak] = count
+
+    # Work backwards: a position before a lost one is won, and a position where every move reaches a won one is lost
+    plies = 0
+    while lost:
+        won = []
+        for wk, p, bk in lost:
+            occupied = 1 << wk | 1 << p | 1 << bk
+            # The strong side's last move: its king or its piece came from some empty square
+            for start in squares(KING_ATTACKS[wk] & ~occupied):
+                i = index(True, start, p, bk)
+                if legal[i] and table[i] == DRAW:
+                    table[i] = plies + 1
+                    won.append((start, p, bk))
+            for start in squares(attacks(WHITE, kind, p, occupied) & ~occupied):
+                i = index(True, wk, start, bk)
+                if legal[i] and table[i] == DRAW:
+                    table[i] = plies + 1
+                    won.append((wk, start, bk))
+        lost = []
+        for wk, p, bk in won:
+            occupied = 1 << wk | 1 << p | 1 << bk
+            # The weak king's last move came from some empty square not next to the strong king
+            for start in squares(KING_ATTACKS[bk] & ~occupied & ~KING_ATTACKS[wk]):
+                i = index(False, wk, p, start)
+                if moves_left[i]:
+                    moves_left[i] -= 1
+                    if moves_left[i] == 0:
+                        table[i] = plies + 2
+                        lost.append((wk, p, start))
+        plies += 2
+    return table
+
+
+def _key(game):
+    '''(kind, index) for a position covered by a table, None when it isn't'''
+    bitboards = game.bitboards
+    if bitboards.occupied.bit_count() != 3 or game.castling:
+        return None
+    boards = bitboards.boards
+    for color in (WHITE, BLACK):
+        for kind in TABLES:
+            piece = boards[color * 6 + kind]
+            if piece:
+                strong_king = boards[color * 6 + KING]
+                weak_king = boards[(color ^ 1) * 6 + KING]
+                flip = 56 if color == BLACK else 0 # Mirror the ranks so the strong side is always white
+                strong_to_move = game.turn == ('white', 'black')[color]
+                return kind, index(strong_to_move, (strong_king.bit_length() - 1) ^ flip,
+                                   (piece.bit_length() - 1) ^ flip, (weak_king.bit_length() - 1) ^ flip)
+    return None
+
+
+class Tablebase:
+    def __init__(self, directory=TABLEBASE_DIR, cache_size=100000):
+        self.directory = directory
+        self.cache_size = cache_size
+        self.cache = OrderedDict() # Position hash: probe result, least recently used first
+        self.tables = {} # kind: mmap, opened on first use (None if the file isn't there)
+        self.hits = 0
+        self.probes = 0
+
+    def available(self):
+        '''Names of the tables that have a file'''
+        return [name for kind, name in TABLES.items() if os.path.exists(os.path.join(self.directory, name + '.tb'))]
+
+    def _table(self, kind):
+        if kind not in self.tables:
+            path = os.path.join(self.directory, TABLES[kind] + '.tb')
+            table = None
+            if os.path.exists(path):
+                with open(path, 'rb') as file:
+                    table = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) # Stays valid after the file closes
+            self.tables[kind] = table
+        return self.tables[kind]
+
+    def probe(self, game):
+        '''(WIN, LOSS or 0 for a draw, plies to mate) from the side to move's point of view,
+        or None if the position has no table'''
+        cached = self.cache.get(game.hash)
+        if cached is not None:
+            self.cache.move_to_end(game.hash)
+            self.hits += 1
+            return cached
+
+        bitboards = game.bitboards
+        if bitboards.occupied.bit_count() == 2 or (bitboards.occupied.bit_count() == 3 and not game.castling and any(
+                bitboards.boards[color * 6 + kind] for color in (WHITE, BLACK) for kind in (KNIGHT, BISHOP))):
+            result = (0, 0) # Bare kings, or a lone knight/bishop can't mate
+        else:
+            key = _key(game)
+            table = self._table(key[0]) if key is not None else None
+            if table is None:
+                return None
+            kind, i = key
+            value = table[i]
+            if value == DRAW:
+                result = (0, 0)
+            else:
+                result = (WIN if i < 262144 else LOSS, value)
+
+        self.probes += 1
+        self.cache[game.hash] = result
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return result
+
+    def best_move(self, game):
+        '''The quickest winning (or slowest losing) move in a position with a table, or None'''
+        best = None
+        for move in list(game.generate_moves()):
+            game.make_move(*move)
+            result = self.probe(game)
+            if result is None and game.bitboards.occupied.bit_count() == 2:
+                result = (0, 0)
+            game.unmake_move()
+            if result is None:
+                return None
+            outcome, plies = result
+            # After our move the result is from the opponent's side: their loss is our win
+            score = -outcome * (1000 - plies) if outcome else 0
+            if best is None or score > best[0]:
+                best = (score, move)
+        return best[1] if best else None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Generate or probe the endgame tablebases')
+    commands = parser.add_subparsers(dest='command', required=True)
+    make = commands.add_parser('generate', help='build the tables by retrograde analysis')
+    make.add_argument('--dir', default=TABLEBASE_DIR)
+    probe = commands.add_parser('probe', help='look up a position')
+    probe.add_argument('fen')
+    probe.add_argument('--dir', default=TABLEBASE_DIR)
+    args = parser.parse_args(argv)
+
+    if args.command == 'generate':
+        os.makedirs(args.dir, exist_ok=True)
+        for kind, name in TABLES.items():
+            start = time.perf_counter()
+            table = generate(kind)
+            with open(os.path.join(args.dir, name + '.tb'), 'wb') as file:
+                file.write(table)
+            longest = max(value for value in table if value != DRAW)
+            print(f'{name}: longest mate {longest} plies, {time.perf_counter() - start:.1f}s')
+        return 0
+
+    game = Game.from_fen(args.fen)
+    tablebase = Tablebase(args.dir)
+    result = tablebase.probe(game)
+    if result is None:
+        print('no table for this position')
+        return 1
+    outcome, plies = result
+    print({WIN: f'win in {plies} plies', LOSS: f'loss in {plies} plies', 0: 'draw'}[outcome])
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
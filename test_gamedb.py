@@ -0,0 +1,45 @@
+#Matthew Jordan and Paul Crowley
+#Tests for gamedb.py: move statistics count games, not how often a game passed through a position
+#
+# HOW TO USE:
+#       python -m pytest test_gamedb.py          (or python -m unittest test_gamedb)
+
+
+import unittest
+
+from engine import Game
+from gamedb import GameDatabase
+from pgn import parse_san
+
+
+def played(*moves):
+    game = Game()
+    for text in moves:
+        game.make_move(*parse_san(game, text))
+    return game
+
+
+class GameDatabaseTest(unittest.TestCase):
+    def setUp(self):
+        self.database = GameDatabase(':memory:')
+        self.addCleanup(self.database.close)
+
+    def test_repeated_position_counts_the_game_once(self):
+        # Nf3 is played twice from the start position in the same game
+        self.database.add_game(played('Nf3', 'Nf6', 'Ng1', 'Ng8', 'Nf3'))
+        start = Game()
+        self.assertEqual(self.database.count_games(start), 1)
+        self.assertEqual(self.database.move_stats(start), [((62, 45, None), 1, 0, 0, 0)])
+
+    def test_counts_add_up_over_games(self):
+        self.database.add_game(played('Nf3', 'Nf6', 'Ng1', 'Ng8', 'Nf3'))
+        self.database.add_game(played('e4', 'e5'))
+        self.database.add_game(played('Nf3', 'd5'))
+        stats = {move: games for move, games, *results in self.database.move_stats(Game())}
+        self.assertEqual(stats, {(62, 45, None): 2, (52, 36, None): 1})
+        self.assertEqual(self.database.count_games(Game()), 3)
+        self.assertEqual(len(self.database.games_reaching(played('Nf3'))), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
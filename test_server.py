@@ -0,0 +1,81 @@
+#Matthew Jordan and Paul Crowley
+#Tests for server.py: bad input from a client gets an error reply and never ends (or forfeits) its game
+#
+# HOW TO USE:
+#       python -m pytest test_server.py          (or python -m unittest test_server)
+
+
+import asyncio
+import json
+import unittest
+
+from server import ChessServer, ProtocolError, parse_move
+
+
+class ParseMoveTest(unittest.TestCase):
+    def test_good_moves(self):
+        self.assertEqual(parse_move('e2e4'), (52, 36, 4))
+        self.assertEqual(parse_move('a7a8n')[:2], (8, 0))
+
+    def test_squares_off_the_board(self):
+        for text in ('o2f3', 'e0e4', 'e2e9', 'i1a1', 'e2e4x', 'e2', 'E2E4', None, 42):
+            with self.assertRaises(ProtocolError, msg=text):
+                parse_move(text)
+
+
+class ServerTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.server = ChessServer()
+        server = await self.server.serve('localhost', 0)
+        self.port = server.sockets[0].getsockname()[1]
+
+    async def asyncTearDown(self):
+        await self.server.close()
+
+    async def connect(self):
+        reader, writer = await asyncio.open_connection('localhost', self.port)
+        self.addAsyncCleanup(self.close_writer, writer)
+        return reader, writer
+
+    async def close_writer(self, writer):
+        writer.close()
+        await writer.wait_closed()
+
+    async def send(self, connection, **message):
+        reader, writer = connection
+        writer.write((json.dumps(message) + '\n').encode())
+        await writer.drain()
+        return json.loads(await asyncio.wait_for(reader.readline(), 5))
+
+    async def start_game(self):
+        white, black = await self.connect(), await self.connect()
+        created = await self.send(white, type='new', base=60)
+        await self.send(black, type='join', game=created['game'])
+        await asyncio.wait_for(white[0].readline(), 5) # White's start message
+        return created['game'], white, black
+
+    async def test_bad_input_is_an_error_not_a_forfeit(self):
+        game_id, white, black = await self.start_game()
+        for move in ('o2f3', 'e0e4', 'e2e9'):
+            reply = await self.send(white, type='move', game=game_id, move=move)
+            self.assertEqual(reply['type'], 'error', move)
+        for bad_id in ([1], {'id': 1}, '1', None):
+            reply = await self.send(black, type='join', game=bad_id)
+            self.assertEqual(reply['type'], 'error', bad_id)
+        # Both connections and the game are still alive, and the move that was meant still works
+        self.assertIn(game_id, self.server.games)
+        reply = await self.send(white, type='move', game=game_id, move='e2e4')
+        self.assertEqual((reply['type'], reply['move']), ('move', 'e2e4'))
+
+    async def test_unexpected_exception_is_an_error_reply(self):
+        game_id, white, black = await self.start_game()
+        def broken(player, message):
+            raise TypeError('bug')
+        self.server.handle = broken
+        reply = await self.send(white, type='list')
+        self.assertEqual(reply, {'type': 'error', 'message': 'internal error'})
+        self.assertIn(game_id, self.server.games)
+
+
+if __name__ == '__main__':
+    unittest.main()
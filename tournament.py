@@ -0,0 +1,225 @@
+#Matthew Jordan and Paul Crowley
+#Engine match runner: plays engine A against engine B headless, many games at once on a pool of worker processes,
+#to tell whether a change to the search or the rules makes the computer play better (or faster).
+#Every opening is played twice with the colors swapped so neither engine gets the better side more often.
+#Each side has its own clock like the GUI (timer_time seconds, plus an increment), running out of time loses.
+#Reports wins/draws/losses, the Elo difference with a 95% error bar, and each engine's nodes per second
+#
+# HOW TO USE:
+#       python tournament.py --games 200 --time 10 --increment 0.1
+#       python tournament.py --a depth=4 --b depth=3,hash=4 --openings openings.fen --workers 4
+#Engine options (comma separated): depth=N (deepest search), hash=MB (transposition table), tablebase=0/1
+
+
+import argparse
+import math
+import multiprocessing
+import os
+import sys
+import time
+
+from engine import Game
+from clock import GameClock
+from search import Searcher, think_time, MAX_DEPTH
+from tablebase import Tablebase
+from batch import read_positions
+from pgn import result_of
+from bitboard import KNIGHT, BISHOP, KING
+
+# A few well known positions a couple of moves in, so the games don't all repeat each other
+OPENINGS = [
+    'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1',
+    'rnbqkbnr/pppp1ppp/8/4p3/4P3/5N2/PPPP1PPP/RNBQKB1R b KQkq - 1 2', # King's knight
+    'rnbqkbnr/pp1ppppp/8/2p5/4P3/8/PPPP1PPP/RNBQKBNR w KQkq c6 0 2', # Sicilian
+    'rnbqkbnr/pppp1ppp/4p3/8/4P3/8/PPPP1PPP/RNBQKBNR w KQkq - 0 2', # French
+    'rnbqkbnr/ppp1pppp/8/3p4/2PP4/8/PP2PPPP/RNBQKBNR b KQkq c3 0 2', # Queen's gambit
+    'rnbqkb1r/pppppppp/5n2/8/3P4/8/PPP1PPPP/RNBQKBNR w KQkq - 1 2', # Indian
+    'rnbqkbnr/pppppppp/8/8/2P5/8/PP1PPPPP/RNBQKBNR b KQkq c3 0 1', # English
+    'rnbqkbnr/pp1ppppp/2p5/8/4P3/8/PPPP1PPP/RNBQKBNR w KQkq - 0 2', # Caro-Kann
+]
+MAX_PLIES = 400 # Longer games are called a draw
+
+
+def parse_engine(text):
+    '''Engine options from "depth=4,hash=8" into a dict (missing ones get the defaults)'''
+    engine = {'depth': MAX_DEPTH, 'hash': 16, 'tablebase': 1}
+    for option in filter(None, (text or '').split(',')):
+        name, _, value = option.partition('=')
+        if name not in engine or not value.isdigit():
+            raise argparse.ArgumentTypeError(f'bad engine option {option!r}')
+        engine[name] = int(value)
+    return engine
+
+
+def opening_problem(fen):
+    '''Why a start position can't be played (a broken FEN, or the game is already over), None if it's fine'''
+    try:
+        game = Game.from_fen(fen)
+    except ValueError as error:
+        return str(error)
+    if next(iter(game.generate_moves()), None) is None:
+        return 'no legal moves'
+    return None
+
+
+def positive(text):
+    value = int(text)
+    if value < 1:
+        raise argparse.ArgumentTypeError('must be at least 1')
+    return value
+
+
+def _drawn(game):
+    '''Adjudicated draws the engine rules don't end on their own: the 50 move rule and bare kings
+    (or a lone knight or bishop), which can't mate'''
+    if game.halfmove_clock >= 100:
+        return '50 moves'
+    boards = game.bitboards.boards
+    extra = game.bitboards.occupied & ~(boards[KING] | boards[6 + KING])
+    if extra.bit_count() <= 1 and not extra & ~(boards[KNIGHT] | boards[BISHOP] | boards[6 + KNIGHT] | boards[6 + BISHOP]):
+        return 'insufficient material'
+    return None
+
+
+def play_game(task):
+    '''Plays one game in a worker. Returns a dict with the result from engine A's side'''
+    fen, a_color, engines, base, increment = task
+    game = Game.from_fen(fen)
+    clock = GameClock(base, increment)
+    searchers = {}
+    for color, engine in zip((a_color, 'black' if a_color == 'white' else 'white'), engines):
+        searchers[color] = Searcher(engine['hash'], Tablebase() if engine['tablebase'] else None), engine['depth']
+    nodes = {'white': 0, 'black': 0}
+    seconds = {'white': 0.0, 'black': 0.0}
+
+    reason = None
+    clock.start(game.turn)
+    while reason is None:
+        color = game.turn
+        searcher, depth = searchers[color]
+        move, score, reached = searcher.search(game, think_time(clock.remaining(color), increment), depth)
+        nodes[color] += searcher.nodes
+        seconds[color] += searcher.elapsed
+        if clock.flagged() == color:
+            game.timeout(color)
+            reason = 'timeout'
+            break
+        clock.press()
+        game.make_move(*move)
+        game.update_status()
+        if game.result is not None:
+            reason = game.result
+        elif _drawn(game):
+            reason = _drawn(game)
+        elif len(game.history) >= MAX_PLIES:
+            reason = 'too long'
+
+    result = result_of(game) if game.winner else '1/2-1/2'
+    score = 0.5 if result == '1/2-1/2' else 1.0 if game.winner == a_color else 0.0
+    b_color = 'black' if a_color == 'white' else 'white'
+    return {'fen': fen, 'a_color': a_color, 'result': result, 'reason': reason, 'score': score, 'plies': len(game.history),
+            'nodes': (nodes[a_color], nodes[b_color]), 'seconds': (seconds[a_color], seconds[b_color])}
+
+
+def elo(score):
+    '''Elo difference that scores the given fraction of the points'''
+    score = min(max(score, 1e-6), 1 - 1e-6)
+    return -400 * math.log10(1 / score - 1)
+
+
+def elo_with_error(wins, draws, losses):
+    '''(Elo difference, 95% error bar) for A against B'''
+    games = wins + draws + losses
+    score = (wins + draws / 2) / games
+    # Standard error of the mean score per game, turned into Elo at both ends of the 95% range
+    variance = (wins * (1 - score) ** 2 + draws * (0.5 - score) ** 2 + losses * score ** 2) / games
+    margin = 1.96 * math.sqrt(variance / games)
+    return elo(score), (elo(score + margin) - elo(score - margin)) / 2
+
+
+def run(engines, openings, games, base, increment, workers=None, progress=True):
+    '''Plays the match and returns the list of game results'''
+    if not openings:
+        raise ValueError('no openings to play')
+    # Checked here rather than in the workers, where one bad position would abort the games already played
+    for fen in openings:
+        problem = opening_problem(fen)
+        if problem is not None:
+            raise ValueError(f'bad opening {fen!r}: {problem}')
+    tasks = []
+    while len(tasks) < games:
+        for fen in openings:
+            for a_color in ('white', 'black'): # Same opening with the colors swapped
+                tasks.append((fen, a_color, engines, base, increment))
+    tasks = tasks[:games]
+
+    results = []
+    with multiprocessing.Pool(workers) as pool:
+        for result in pool.imap_unordered(play_game, tasks):
+            results.append(result)
+            if progress:
+                wins, draws, losses = tally(results)
+                print(f'\rgame {len(results)}/{games}: +{wins} ={draws} -{losses}', end='', flush=True)
+    if progress:
+        print()
+    return results
+
+
+def tally(results):
+    wins = sum(result['score'] == 1 for result in results)
+    draws = sum(result['score'] == 0.5 for result in results)
+    return wins, draws, len(results) - wins - draws
+
+
+def report(results):
+    wins, draws, losses = tally(results)
+    lines = [f'{len(results)} games: A +{wins} ={draws} -{losses} ({(wins + draws / 2) / len(results):.1%})']
+    if wins + draws and losses + draws: # Elo is infinite when one side scored every point
+        difference, error = elo_with_error(wins, draws, losses)
+        lines.append(f'Elo difference A - B: {difference:+.0f} +/- {error:.0f} (95%)')
+    else:
+        lines.append('Elo difference A - B: not measurable, one side scored every point')
+    for index, name in enumerate('AB'):
+        nodes = sum(result['nodes'][index] for result in results)
+        seconds = sum(result['seconds'][index] for result in results)
+        lines.append(f'engine {name}: {nodes / seconds if seconds else 0:.0f} nodes per second')
+    reasons = {}
+    for result in results:
+        reasons[result['reason']] = reasons.get(result['reason'], 0) + 1
+    lines.append('endings: ' + ', '.join(f'{reason} {count}' for reason, count in sorted(reasons.items())))
+    lines.append(f'average length {sum(result["plies"] for result in results) / len(results):.0f} plies')
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Play two engine settings against each other')
+    parser.add_argument('--a', type=parse_engine, default=parse_engine(''), help='engine A options, e.g. depth=4,hash=16')
+    parser.add_argument('--b', type=parse_engine, default=parse_engine(''), help='engine B options')
+    parser.add_argument('--games', type=positive, default=100)
+    parser.add_argument('--time', type=float, default=10, help='seconds on each clock (the GUI uses 60)')
+    parser.add_argument('--increment', type=float, default=0.1, help='seconds added after every move')
+    parser.add_argument('--openings', help='file of FEN/EPD start positions (default: a few built in openings)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='games played at once (default: one per core, more makes the clocks unfair)')
+    args = parser.parse_args(argv)
+
+    openings = OPENINGS
+    if args.openings:
+        with open(args.openings) as file:
+            openings = []
+            for fen in read_positions(file):
+                problem = opening_problem(fen)
+                if problem is None:
+                    openings.append(fen)
+                else:
+                    print(f'skipping {fen}: {problem}', file=sys.stderr)
+        if not openings:
+            parser.error(f'no playable positions in {args.openings}')
+    start = time.perf_counter()
+    results = run((args.a, args.b), openings, args.games, args.time, args.increment, args.workers)
+    print(report(results))
+    print(f'{time.perf_counter() - start:.0f}s on {args.workers} workers')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
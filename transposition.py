@@ -0,0 +1,83 @@
+#Matthew Jordan and Paul Crowley
+#Transposition table: remembers results for positions by their Zobrist hash (see zobrist.py)
+#It has a fixed number of slots worked out from a memory budget, so it never grows while searching.
+#The slots are two preallocated arrays of 64 bit numbers (the keys, and everything else packed into one number),
+#so the table really takes the megabytes it was given (a list of tuples took nearly twice as much)
+
+
+from array import array
+
+EXACT, LOWER, UPPER = 0, 1, 2 # What kind of bound the stored value is
+
+ENTRY_BYTES = 16 # One key and one packed entry, 8 bytes each
+
+# Packed entry bits: in use (1), depth (8), value + VALUE_OFFSET (22), flag (2), move (15), generation (8)
+VALUE_OFFSET = 1 << 21
+DEPTH_SHIFT, VALUE_SHIFT, FLAG_SHIFT, MOVE_SHIFT, GENERATION_SHIFT = 1, 9, 31, 33, 48
+
+
+def pack_move(move):
+    '''A move as 15 bits: start, end, promotion + 1 (0 for none). No move is 0 (start and end are never the same)'''
+    if move is None:
+        return 0
+    start, end, promotion = move
+    return start | end << 6 | (0 if promotion is None else promotion + 1) << 12
+
+
+def unpack_move(bits):
+    if not bits:
+        return None
+    promotion = bits >> 12
+    return bits & 63, bits >> 6 & 63, None if not promotion else promotion - 1
+
+
+class TranspositionTable:
+    def __init__(self, megabytes=16):
+        # Round down to a power of two so a slot is picked with a mask instead of a modulo
+        size = 1
+        while size * 2 * ENTRY_BYTES <= megabytes * 1024 * 1024:
+            size *= 2
+        self.mask = size - 1
+        self.keys = array('Q', [0]) * size
+        self.entries = array('Q', [0]) * size # 0 means an empty slot
+        self.generation = 0 # Bumped every search so old entries can be recognised and replaced
+        self.hits = 0
+        self.stores = 0
+
+    def __len__(self):
+        return len(self.keys)
+
+    def clear(self):
+        self.keys = array('Q', [0]) * len(self.keys)
+        self.entries = array('Q', [0]) * len(self.keys)
+        self.generation = 0
+
+    def new_search(self):
+        self.generation = (self.generation + 1) & 255
+
+    def probe(self, key):
+        '''Returns (depth, value, flag, move) stored for key, or None'''
+        index = key & self.mask
+        entry = self.entries[index]
+        if entry and self.keys[index] == key:
+            self.hits += 1
+            return (entry >> DEPTH_SHIFT & 255, (entry >> VALUE_SHIFT & 0x3FFFFF) - VALUE_OFFSET,
+                    entry >> FLAG_SHIFT & 3, unpack_move(entry >> MOVE_SHIFT & 0x7FFF))
+        return None
+
+    def store(self, key, depth, value, flag, move):
+        '''Depth-preferred replacement: a slot is only overwritten by the same position, a search at least as deep,
+        or anything once the old entry is from an earlier search'''
+        index = key & self.mask
+        entry = self.entries[index]
+        if not entry or self.keys[index] == key or depth >= entry >> DEPTH_SHIFT & 255 \
+                or entry >> GENERATION_SHIFT != self.generation:
+            self.keys[index] = key
+            self.entries[index] = (1 | min(depth, 255) << DEPTH_SHIFT | (value + VALUE_OFFSET) << VALUE_SHIFT
+                                   | flag << FLAG_SHIFT | pack_move(move) << MOVE_SHIFT | self.generation << GENERATION_SHIFT)
+            self.stores += 1
+
+    def usage(self):
+        '''Fraction of the first 1000 slots holding something, a cheap estimate of how full the table is'''
+        sample = self.entries[:1000]
+        return sum(1 for entry in sample if entry) / len(sample)
@@ -0,0 +1,36 @@
+#Matthew Jordan and Paul Crowley
+#Zobrist hashing for Chess: a position's hash is the XOR of one random 64-bit key per (piece, square),
+#plus keys for the side to move, castling rights and en passant file
+#engine.Game updates its hash as moves are made, so two positions can be compared with one integer compare
+
+
+import random
+
+from bitboard import squares
+
+# Fixed seed so every process (batch workers, the GUI, saved books/databases) agrees on the hashes
+_random = random.Random(20241216)
+
+
+def _key():
+    return _random.getrandbits(64)
+
+
+PIECE_KEYS = [[_key() for sq in range(64)] for index in range(12)] # Indexed [color * 6 + kind][square]
+BLACK_TO_MOVE = _key()
+CASTLING_KEYS = [_key() for rights in range(16)]
+EP_KEYS = [_key() for col in range(8)]
+
+
+def hash_position(bitboards, black_to_move, castling, ep_square):
+    '''Builds the hash from scratch (engine.Game only does this once, then updates it move by move)'''
+    h = 0
+    for index, bb in enumerate(bitboards.boards):
+        for sq in squares(bb):
+            h ^= PIECE_KEYS[index][sq]
+    if black_to_move:
+        h ^= BLACK_TO_MOVE
+    h ^= CASTLING_KEYS[castling]
+    if ep_square is not None:
+        h ^= EP_KEYS[ep_square & 7]
+    return h